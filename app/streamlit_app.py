@@ -3,6 +3,7 @@ Streamlit 의료 상담 앱
 """
 
 import streamlit as st
+import json
 import os
 import sys
 from datetime import datetime
@@ -17,15 +18,17 @@ from config.config import (
     PAGE_ICON,
     SIDEBAR_TITLE,
     PDF_FILE_PATH,
-    OPENAI_API_KEY
+    METRICS_SIDEBAR,
+    get_settings
 )
-from core.rag.rag_system import RAGSystem
+from core.rag.rag_system import get_shared_rag_system
 from core.patient.patient_management import (
     initialize_patient_info,
     generate_patient_summary,
     save_patient_chart
 )
 from core.consultation.medical_consultation import MedicalConsultation
+from core.telemetry.metrics import export_json, export_prometheus
 
 
 # 페이지 설정
@@ -101,14 +104,15 @@ def initialize_session_state():
 
 
 def initialize_rag_system():
-    """RAG 시스템 초기화"""
+    """RAG 시스템 초기화 (프로세스 공유 인덱스 + 세션별 상담 상태)"""
     if st.session_state.rag_system is None:
         with st.spinner('📄 PDF 문서 로딩 및 RAG 시스템 구축 중...'):
             try:
                 # PDF_FILE_PATH가 Path 객체인 경우 문자열로 변환
                 pdf_path = str(PDF_FILE_PATH) if isinstance(PDF_FILE_PATH, Path) else PDF_FILE_PATH
-                rag = RAGSystem(pdf_path)
-                num_pages = rag.load_and_build()
+                # 인덱스는 모든 세션이 공유하고, 최초 세션만 구축 비용을 부담
+                rag = get_shared_rag_system(pdf_path)
+                num_pages = len(rag.pages)
                 st.session_state.rag_system = rag
                 st.session_state.consultation = MedicalConsultation(rag)
                 st.session_state.initialized = True
@@ -227,6 +231,43 @@ def display_diagnosis_section():
         st.sidebar.info("최소 2개 이상의 증상이 수집되어야 진단 보고서를 생성할 수 있습니다.")
 
 
+def display_metrics_sidebar():
+    """운영자용 단계별 성능 지표 패널 (프로세스 전체 집계)"""
+    st.sidebar.divider()
+    with st.sidebar.expander("📈 성능 지표"):
+        metrics = export_json()
+        if not metrics:
+            st.caption("아직 기록된 지표가 없습니다.")
+            return
+        st.dataframe(
+            [
+                {
+                    "단계": name,
+                    "횟수": stage['count'],
+                    "평균(초)": round(stage['mean_s'], 3),
+                    "p95(초)": stage['p95_s'],
+                    "토큰": stage['prompt_tokens'] + stage['completion_tokens'],
+                    "캐시 적중": stage['cache_hits'],
+                    "오류": stage['errors']
+                }
+                for name, stage in metrics.items()
+            ],
+            hide_index=True
+        )
+        st.download_button(
+            label="📥 JSON",
+            data=json.dumps(metrics, ensure_ascii=False, indent=2),
+            file_name="metrics.json",
+            mime="application/json"
+        )
+        st.download_button(
+            label="📥 Prometheus",
+            data=export_prometheus(),
+            file_name="metrics.prom",
+            mime="text/plain"
+        )
+
+
 def display_diagnosis_report():
     """진단 보고서 표시"""
     if st.session_state.diagnosis_generated and 'diagnosis_result' in st.session_state:
@@ -282,7 +323,6 @@ def display_diagnosis_report():
         
         with col2:
             # JSON 다운로드 버튼
-            import json
             chart_json = json.dumps(
                 st.session_state.patient_info, 
                 ensure_ascii=False, 
@@ -312,10 +352,10 @@ def main():
     </div>
     """, unsafe_allow_html=True)
 
-    # API 키 확인 (config.py에서 이미 검증되지만, 사용자 친화적 메시지 표시)
+    # API 키 확인 (클라이언트 생성 시에도 검증되지만, 사용자 친화적 메시지 표시)
     try:
-        api_key = OPENAI_API_KEY
-        if not api_key:
+        settings = get_settings()
+        if not settings.openai_api_key and settings.llm_backend != "fake" and settings.cassette_mode != "replay":
             st.error("❌ OpenAI API 키가 설정되지 않았습니다.")
             st.info("""
             **설정 방법:**
@@ -323,6 +363,7 @@ def main():
             2. .env 파일 생성: 프로젝트 루트에 `.env` 파일을 만들고 `OPENAI_API_KEY=your-api-key` 추가
             """)
             st.stop()
+        settings.validate()
     except ValueError as e:
         st.error(f"❌ 설정 오류: {e}")
         st.stop()
@@ -335,6 +376,8 @@ def main():
     # 사이드바 - 환자 정보
     display_patient_info_sidebar()
     display_diagnosis_section()
+    if METRICS_SIDEBAR:
+        display_metrics_sidebar()
     
     # 메인 컨텐츠
     col1, col2 = st.columns([2, 1])
@@ -355,34 +398,41 @@ def main():
                 "content": user_input
             })
             
-            with st.spinner('👨‍⚕️ 의사 선생님이 생각 중...'):
-                try:
-                    # 의사 응답 생성
-                    doctor_response, updated_patient_info, diagnosis_stage = \
-                        st.session_state.consultation.process_user_message(
+            with st.chat_message("user", avatar="🗣️"):
+                st.markdown(user_input)
+            
+            try:
+                with st.spinner('👨‍⚕️ 의사 선생님이 생각 중...'):
+                    # 정보 추출 후 의사 응답 스트림 시작
+                    doctor_stream, updated_patient_info, diagnosis_stage = \
+                        st.session_state.consultation.process_user_message_stream(
                             user_input,
                             st.session_state.patient_info,
                             st.session_state.conversation_count
                         )
-                    
-                    # 상태 업데이트
-                    st.session_state.patient_info = updated_patient_info
-                    st.session_state.conversation_count += 1
-                    
-                    # 의사 메시지 추가
-                    st.session_state.chat_history.append({
-                        "role": "doctor",
-                        "content": doctor_response
-                    })
-                    
-                    # 진단 단계 진입 시 알림
-                    if diagnosis_stage and st.session_state.conversation_count == 4:
-                        st.info("🔍 충분한 정보가 수집되어 진단 단계로 진입했습니다.")
-                    
-                    st.rerun()
-                    
-                except Exception as e:
-                    st.error(f'오류 발생: {e}')
+                
+                # 의사 응답을 도착하는 대로 표시
+                with st.chat_message("assistant", avatar="👨‍⚕️"):
+                    doctor_response = st.write_stream(doctor_stream)
+                
+                # 상태 업데이트
+                st.session_state.patient_info = updated_patient_info
+                st.session_state.conversation_count += 1
+                
+                # 의사 메시지 추가
+                st.session_state.chat_history.append({
+                    "role": "doctor",
+                    "content": doctor_response
+                })
+                
+                # 진단 단계 진입 시 알림
+                if diagnosis_stage and st.session_state.conversation_count == 4:
+                    st.info("🔍 충분한 정보가 수집되어 진단 단계로 진입했습니다.")
+                
+                st.rerun()
+                
+            except Exception as e:
+                st.error(f'오류 발생: {e}')
     
     with col2:
         # 진단 보고서 표시 (생성된 경우)
@@ -0,0 +1,302 @@
+"""
+동시 상담 부하 테스트
+
+N개의 페르소나 세션을 동시에 실행하여 MedicalConsultation.process_user_message와
+generate_final_diagnosis를 끝까지 호출하고, 처리량, 턴 지연 백분위수, 단계별 시간,
+최대 메모리 사용량(RSS)을 JSON으로 기록합니다.
+
+사용 예:
+    LLM_BACKEND=fake python -m benchmarks.load_test --sessions 50 --concurrency 10
+    python -m benchmarks.load_test --backend openai --sessions 5 --output results.json
+
+--backend openai는 실제 API를 호출합니다. OPENAI_BASE_URL을 지정하면
+OpenAI 호환 로컬 서버로 요청을 보낼 수 있습니다.
+
+--record로 실제 호출을 카세트에 기록해 두면 --replay로 API 없이 같은 상담을
+결정적으로 재생할 수 있습니다 (--replay-latency zero이면 지연 없이 CPU 비용만 측정).
+    python -m benchmarks.load_test --backend openai --sessions 5 --record data/cassettes/load.jsonl
+    python -m benchmarks.load_test --sessions 5 --replay data/cassettes/load.jsonl --replay-latency zero
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List
+
+# 프로젝트 루트를 sys.path에 추가
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """최근접 순위(nearest-rank) 백분위수 (값이 없으면 0)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """지연 시간 리스트 요약 (초)"""
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else 0.0
+    }
+
+
+def peak_rss_mb() -> float:
+    """프로세스 최대 RSS (MB, Linux는 KB, macOS는 바이트 단위로 보고)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    divisor = 1024 * 1024 if platform.system() == "Darwin" else 1024
+    return peak / divisor
+
+
+class StageRecorder:
+    """단계별 소요 시간 기록 (여러 스레드에서 사용)"""
+
+    def __init__(self):
+        self._durations = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self._durations.setdefault(stage, []).append(seconds)
+
+    def values(self, stage: str) -> List[float]:
+        with self._lock:
+            return list(self._durations.get(stage, []))
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            stages = dict(self._durations)
+        return {
+            stage: dict(summarize(durations), total=sum(durations))
+            for stage, durations in sorted(stages.items())
+        }
+
+
+class _TimedEndpoint:
+    def __init__(self, create, recorder: StageRecorder, kind: str):
+        self._create = create
+        self._recorder = recorder
+        self._kind = kind
+
+    def create(self, **kwargs):
+        from core.llm.scheduler import current_priority
+
+        start = time.perf_counter()
+        try:
+            return self._create(**kwargs)
+        finally:
+            # 스트리밍 호출은 첫 응답까지의 시간
+            self._recorder.record(f"llm.{self._kind}.{current_priority()}", time.perf_counter() - start)
+
+
+class TimedClient:
+    """API 호출 시간을 우선순위(interactive/report/extraction/background/prefetch)별로 기록하는 래퍼"""
+
+    def __init__(self, client, recorder: StageRecorder):
+        from types import SimpleNamespace
+
+        self.chat = SimpleNamespace(completions=_TimedEndpoint(client.chat.completions.create, recorder, "chat"))
+        self.embeddings = _TimedEndpoint(client.embeddings.create, recorder, "embedding")
+
+
+def run_session(session_index: int, rag_system, client, recorder: StageRecorder, consultation_options: Dict[str, Any]):
+    """페르소나 하나의 상담을 처음부터 최종 진단까지 실행"""
+    from benchmarks.synthetic import get_persona
+    from core.consultation.medical_consultation import MedicalConsultation
+    from core.patient.patient_management import initialize_patient_info
+
+    persona = get_persona(session_index)
+    consultation = MedicalConsultation(rag_system, client=client, **consultation_options)
+    patient_info = initialize_patient_info()
+    consultation.get_initial_greeting()
+    session_start = time.perf_counter()
+
+    for count, utterance in enumerate(persona['utterances'], 1):
+        start = time.perf_counter()
+        _, patient_info, _ = consultation.process_user_message(utterance, patient_info, count)
+        recorder.record("turn", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    consultation.generate_final_diagnosis(patient_info)
+    recorder.record("final_diagnosis", time.perf_counter() - start)
+    recorder.record("session", time.perf_counter() - session_start)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="동시 상담 부하 테스트")
+    parser.add_argument("--sessions", type=int, default=20, help="실행할 전체 상담 세션 수")
+    parser.add_argument("--concurrency", type=int, default=5, help="동시에 진행할 세션 수")
+    parser.add_argument("--backend", choices=["fake", "openai"], default=os.getenv("LLM_BACKEND", "fake"))
+    parser.add_argument("--pdf", help="RAG 문헌 PDF (없으면 합성 PDF 생성)")
+    parser.add_argument("--synthetic-pages", type=int, default=50, help="합성 PDF 페이지 수")
+    parser.add_argument("--latency-median", type=float, help="가짜 백엔드 첫 토큰 지연 중앙값 (초)")
+    parser.add_argument("--latency-sigma", type=float, help="가짜 백엔드 지연 로그 표준편차")
+    parser.add_argument("--error-rate", type=float, help="가짜 백엔드 오류율")
+    parser.add_argument("--seed", type=int, default=0, help="가짜 백엔드 시드")
+    parser.add_argument(
+        "--rate-limits", choices=["config", "none"],
+        help="모델별 속도 한도 적용 여부 (기본: openai는 config, fake는 none)"
+    )
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument("--record", help="모든 LLM 호출을 기록할 카세트 경로")
+    cassette.add_argument("--replay", help="API 대신 재생할 카세트 경로")
+    parser.add_argument(
+        "--replay-latency", choices=["recorded", "zero"], default="recorded",
+        help="재생 시 기록된 지연을 재현할지 여부"
+    )
+    parser.add_argument("--pipelined", action="store_true", help="백그라운드 정보 추출 사용")
+    parser.add_argument("--single-call", action="store_true", help="단일 호출 턴 모드 사용")
+    parser.add_argument("--output", help="결과 JSON 경로 (없으면 표준 출력)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> Dict[str, Any]:
+    args = parse_args(argv)
+    # 설정 모듈을 불러오기 전에 백엔드 선택
+    os.environ["LLM_BACKEND"] = args.backend
+
+    from config import config
+    from core.llm.client import PooledOpenAIClient
+    from core.llm.scheduler import LLMScheduler
+    from core.rag.rag_system import RAGSystem
+    from core.telemetry.metrics import export_json
+    from benchmarks.synthetic import build_synthetic_pdf
+
+    if args.replay:
+        base_client = None
+    elif args.backend == "fake":
+        from core.llm.fake_backend import FakeOpenAIClient
+
+        latency = dict(config.FAKE_LLM_LATENCY or {})
+        if args.latency_median is not None:
+            latency['median'] = args.latency_median
+        if args.latency_sigma is not None:
+            latency['sigma'] = args.latency_sigma
+        base_client = FakeOpenAIClient(
+            latency=latency,
+            token_latency=config.FAKE_LLM_TOKEN_LATENCY,
+            error_rate=config.FAKE_LLM_ERROR_RATE if args.error_rate is None else args.error_rate,
+            seed=args.seed
+        )
+    else:
+        from openai import OpenAI
+
+        base_client = OpenAI(
+            api_key=config.get_settings().openai_api_key,
+            timeout=config.OPENAI_TIMEOUT,
+            max_retries=config.OPENAI_MAX_RETRIES
+        )
+
+    if args.record or args.replay:
+        from core.llm.cassette import Cassette, CassetteClient
+
+        base_client = CassetteClient(
+            base_client,
+            Cassette(args.record or args.replay),
+            "record" if args.record else "replay",
+            args.replay_latency
+        )
+
+    recorder = StageRecorder()
+    # 가짜 백엔드로 프로세스 처리 한계를 잴 때는 계정 속도 한도를 적용하지 않음
+    rate_limits = args.rate_limits or ("config" if args.backend == "openai" else "none")
+    scheduler = LLMScheduler(
+        config.LLM_RATE_LIMITS if rate_limits == "config" else {},
+        config.OPENAI_MAX_CONCURRENCY,
+        config.LLM_QUEUE_DEADLINES
+    )
+    client = PooledOpenAIClient(TimedClient(base_client, recorder), scheduler)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = args.pdf
+        if pdf_path is None:
+            pdf_path = str(build_synthetic_pdf(Path(temp_dir) / "synthetic.pdf", args.synthetic_pages, seed=args.seed))
+
+        start = time.perf_counter()
+        rag_system = RAGSystem(pdf_path, cache_dir=None, client=client)
+        rag_system.load_and_build()
+        recorder.record("rag_build", time.perf_counter() - start)
+
+        consultation_options = {
+            "pipelined_extraction": args.pipelined,
+            "single_call_turn": args.single_call
+        }
+        errors = []
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            futures = [
+                executor.submit(run_session, index, rag_system, client, recorder, consultation_options)
+                for index in range(args.sessions)
+            ]
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    errors.append(f"{type(e).__name__}: {e}")
+        duration = time.perf_counter() - start
+
+    turns = recorder.values("turn")
+    completed = len(recorder.values("final_diagnosis"))
+    result = {
+        "timestamp": datetime.now().isoformat(timespec='seconds'),
+        "config": {
+            "backend": args.backend,
+            "sessions": args.sessions,
+            "concurrency": args.concurrency,
+            "pdf": args.pdf or f"synthetic:{args.synthetic_pages}",
+            "seed": args.seed,
+            "rate_limits": rate_limits,
+            "cassette": {"record": args.record, "replay": args.replay, "latency": args.replay_latency},
+            "pipelined_extraction": args.pipelined,
+            "single_call_turn": args.single_call,
+            "model": config.GPT_MODEL
+        },
+        "duration_s": duration,
+        "completed_sessions": completed,
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "throughput": {
+            "sessions_per_s": completed / duration if duration else 0.0,
+            "turns_per_s": len(turns) / duration if duration else 0.0
+        },
+        "turn_latency_s": summarize(turns),
+        "final_diagnosis_latency_s": summarize(recorder.values("final_diagnosis")),
+        "stages": recorder.summary(),
+        "spans": export_json(),
+        "scheduler": scheduler.stats(),
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(text, encoding='utf-8')
+        print(
+            f"세션 {completed}/{args.sessions}, {result['throughput']['turns_per_s']:.2f} 턴/초, "
+            f"p95 {result['turn_latency_s']['p95']:.3f}초, 최대 RSS {result['peak_rss_mb']:.1f}MB → {args.output}"
+        )
+    else:
+        print(text)
+    return result
+
+
+if __name__ == "__main__":
+    main()
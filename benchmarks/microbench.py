@@ -0,0 +1,289 @@
+"""
+핵심 경로 마이크로벤치마크 (오프라인, 고정 시드)
+
+RAG 인덱스 구축/검색, 환자 정보 병합, 차트 생성 함수의 실행 시간을 측정하고
+저장된 기준값(baselines.json)과 비교합니다. 기준값보다 threshold 이상 느려진
+항목이 있으면 종료 코드 1을 반환합니다.
+
+사용 예:
+    python -m benchmarks.microbench
+    python -m benchmarks.microbench --filter rag --threshold 0.5
+    python -m benchmarks.microbench --update-baseline
+
+기준값은 측정한 기계에 따라 달라지므로 비교할 환경에서 --update-baseline으로 다시 만드세요.
+"""
+
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Callable, Tuple
+
+# 프로젝트 루트를 sys.path에 추가
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+# 설정 모듈을 불러오기 전에 오프라인 백엔드 선택
+os.environ["LLM_BACKEND"] = "fake"
+
+from benchmarks.synthetic import build_synthetic_pdf, PERSONAS
+from core.llm.fake_backend import FakeOpenAIClient
+from core.patient.patient_management import (
+    initialize_patient_info,
+    extract_patient_info,
+    merge_extracted_info,
+    generate_patient_summary,
+    get_symptoms_summary,
+    save_patient_chart
+)
+from core.rag.rag_system import RAGSystem
+
+
+DEFAULT_BASELINE_PATH = Path(__file__).parent / "baselines.json"
+DEFAULT_THRESHOLD = 0.25  # 기준값보다 25% 이상 느리면 회귀
+SEED = 1234
+
+# 합성 문헌 크기
+PDF_PAGES = 300
+WORDS_PER_PAGE = 400
+
+# RAG 검색 질의 (증상 분석 질의 형식)
+RAG_QUERIES = [
+    "다음 증상과 관련된 청각 장애 유형, 원인, 그리고 관련 질환을 알려주세요: 갑작스러운 편측 난청, 이명, 어지러움",
+    "다음 증상과 관련된 청각 장애 유형, 원인, 그리고 관련 질환을 알려주세요: 반복되는 현기증과 이충만감",
+    "다음 증상과 관련된 청각 장애 유형, 원인, 그리고 관련 질환을 알려주세요: 소아 중이염, 이통, 고름",
+    "다음 증상과 관련된 청각 장애 유형, 원인, 그리고 관련 질환을 알려주세요: 소음 노출 후 양측 점진적 난청",
+    "다음 증상과 관련된 청각 장애 유형, 원인, 그리고 관련 질환을 알려주세요: 노인성 난청, 보청기 상담",
+]
+
+# 합성 환자 정보에 사용할 증상 표현
+SYMPTOM_WORDS = [
+    "이명", "청력 저하", "어지러움", "이충만감", "이통", "이루", "두통", "구역/구토",
+    "귀 가려움", "자성 강청", "소리 왜곡", "청각 과민", "안면 마비", "발열",
+]
+
+
+def _random_symptoms(rng: random.Random, count: int) -> List[str]:
+    """중복이 섞인 증상 리스트 (변형 표현 포함)"""
+    return [f"{rng.choice(SYMPTOM_WORDS)} {rng.randint(1, count)}" for _ in range(count)]
+
+
+def _long_patient_info(rng: random.Random, turns: int, list_size: int) -> Dict[str, Any]:
+    """긴 대화 기록과 큰 증상 리스트를 가진 환자 정보"""
+    patient_info = initialize_patient_info()
+    patient_info['patient_id'] = "PBENCH"
+    patient_info['timestamp'] = "2024-01-01 00:00:00"
+    merge_extracted_info(patient_info, {
+        "name": "홍길동",
+        "age": 45,
+        "gender": "남성",
+        "chief_complaint": "청력 저하",
+        "onset": "1주일 전",
+        "affected_side": "오른쪽",
+        "progression": "갑작스러움",
+        "symptoms": _random_symptoms(rng, list_size),
+        "additional_symptoms": _random_symptoms(rng, list_size),
+        "medical_history": [f"병력 {i}" for i in range(list_size // 4)],
+        "medications": [f"약물 {i}" for i in range(list_size // 4)],
+    })
+    patient_info['suspected_diagnosis'] = ["돌발성 난청", "메니에르병", "청신경종"]
+    for turn in range(turns):
+        persona = PERSONAS[turn % len(PERSONAS)]
+        patient_info['conversation_history'].append({
+            "role": "patient" if turn % 2 == 0 else "doctor",
+            "content": persona['utterances'][turn % len(persona['utterances'])] * 3,
+            "timestamp": "00:00:00"
+        })
+    return patient_info
+
+
+def _conversation_messages(turns: int) -> List[Dict[str, str]]:
+    """extract_patient_info용 대화 기록"""
+    messages = [{"role": "system", "content": "의사 시스템 프롬프트"}]
+    for turn in range(turns):
+        persona = PERSONAS[turn % len(PERSONAS)]
+        messages.append({"role": "user", "content": persona['utterances'][turn % len(persona['utterances'])]})
+        messages.append({"role": "assistant", "content": "그 증상이 처음 나타난 것은 언제쯤인가요?"})
+    return messages
+
+
+def build_cases(work_dir: Path) -> List[Tuple[str, Callable[[], None], int]]:
+    """
+    벤치마크 항목 생성 (준비 작업은 여기서 끝내고 측정할 함수만 반환)
+
+    Returns:
+        (이름, 측정 함수, 라운드당 반복 횟수) 리스트
+    """
+    rng = random.Random(SEED)
+    client = FakeOpenAIClient(seed=SEED)
+    pdf_path = str(build_synthetic_pdf(work_dir / "synthetic.pdf", PDF_PAGES, WORDS_PER_PAGE, seed=SEED))
+
+    def rag_build():
+        RAGSystem(pdf_path, cache_dir=None, extract_workers=1, client=client).load_and_build()
+
+    # 페이지 캐시가 채워진 상태의 재시작 경로
+    cache_dir = work_dir / "cache"
+    RAGSystem(pdf_path, cache_dir=cache_dir, extract_workers=1, client=client).load_and_build()
+
+    def rag_build_cached():
+        RAGSystem(pdf_path, cache_dir=cache_dir, extract_workers=1, client=client).load_and_build()
+
+    rag_system = RAGSystem(pdf_path, cache_dir=None, extract_workers=1, client=client)
+    rag_system.load_and_build()
+    rag_system.response_cache = None  # 매번 검색과 프롬프트 구성을 수행
+
+    def rag_query():
+        for query in RAG_QUERIES:
+            rag_system.query(query)
+
+    extracted_batches = [
+        {
+            "symptoms": _random_symptoms(rng, 200),
+            "additional_symptoms": _random_symptoms(rng, 200),
+            "medical_history": _random_symptoms(rng, 50),
+            "medications": _random_symptoms(rng, 50),
+            "chief_complaint": "청력 저하",
+            "onset": "1주일 전",
+        }
+        for _ in range(50)
+    ]
+
+    def merge_large_lists():
+        patient_info = initialize_patient_info()
+        for extracted_info in extracted_batches:
+            merge_extracted_info(patient_info, extracted_info)
+
+    conversation = _conversation_messages(40)
+    extraction_patient = _long_patient_info(rng, 0, 200)
+
+    def extract_with_large_lists():
+        extract_patient_info(conversation, copy.deepcopy(extraction_patient), client)
+
+    long_patient = _long_patient_info(rng, 2000, 300)
+    chart_path = str(work_dir / "chart.json")
+
+    return [
+        (f"rag.load_and_build[{PDF_PAGES}p]", rag_build, 1),
+        (f"rag.load_and_build.cached[{PDF_PAGES}p]", rag_build_cached, 1),
+        (f"rag.query[{len(RAG_QUERIES)}q]", rag_query, 5),
+        ("patient.merge_extracted_info[50x200]", merge_large_lists, 5),
+        ("patient.extract_patient_info[200]", extract_with_large_lists, 20),
+        ("chart.generate_patient_summary[2000t]", lambda: generate_patient_summary(long_patient), 50),
+        ("chart.get_symptoms_summary[2000t]", lambda: get_symptoms_summary(long_patient), 200),
+        ("chart.save_patient_chart[2000t]", lambda: save_patient_chart(long_patient, chart_path), 5),
+    ]
+
+
+def measure(function: Callable[[], None], number: int, repeat: int) -> Dict[str, float]:
+    """
+    실행 시간 측정 (워밍업 1회 후 repeat 라운드, 라운드마다 number회 실행)
+
+    Returns:
+        호출 1회당 중앙값/최솟값 (초)
+    """
+    function()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - start) / number)
+    return {"median_s": statistics.median(timings), "min_s": min(timings), "rounds": repeat, "number": number}
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], threshold: float) -> Dict[str, Dict[str, Any]]:
+    """기준값 대비 비율과 회귀 여부"""
+    comparison = {}
+    for name, result in results.items():
+        reference = baseline.get('cases', {}).get(name)
+        if reference is None:
+            comparison[name] = {"status": "new"}
+            continue
+        ratio = result['median_s'] / reference['median_s'] if reference['median_s'] else 0.0
+        comparison[name] = {
+            "baseline_s": reference['median_s'],
+            "ratio": ratio,
+            "status": "regression" if ratio > 1 + threshold else ("faster" if ratio < 1 - threshold else "ok")
+        }
+    return comparison
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="핵심 경로 마이크로벤치마크")
+    parser.add_argument("--filter", help="이름에 이 문자열이 포함된 항목만 실행")
+    parser.add_argument("--repeat", type=int, default=5, help="측정 라운드 수")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE_PATH), help="기준값 JSON 경로")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="회귀로 판단할 느려짐 비율")
+    parser.add_argument("--update-baseline", action="store_true", help="측정 결과로 기준값 갱신")
+    parser.add_argument("--output", help="결과 JSON 경로")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name, function, number in build_cases(Path(temp_dir)):
+            if args.filter and args.filter not in name:
+                continue
+            results[name] = measure(function, number, args.repeat)
+            print(f"{name:45s} {results[name]['median_s'] * 1000:10.3f} ms")
+
+    baseline_path = Path(args.baseline)
+    environment = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+
+    if args.update_baseline:
+        baseline = {"cases": {}}
+        if baseline_path.exists():
+            baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+        baseline['environment'] = environment
+        baseline['updated_at'] = datetime.now().isoformat(timespec='seconds')
+        baseline.setdefault('cases', {}).update(
+            {name: {"median_s": result['median_s']} for name, result in results.items()}
+        )
+        baseline_path.write_text(json.dumps(baseline, ensure_ascii=False, indent=2) + "\n", encoding='utf-8')
+        print(f"기준값 저장: {baseline_path}")
+        return 0
+
+    baseline = {}
+    if baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+    else:
+        print(f"기준값 파일이 없습니다: {baseline_path} (--update-baseline으로 생성)")
+
+    comparison = compare(results, baseline, args.threshold)
+    regressions = [name for name, item in comparison.items() if item['status'] == "regression"]
+    for name, item in comparison.items():
+        if 'ratio' in item:
+            print(f"{name:45s} x{item['ratio']:.2f} ({item['status']})")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            "timestamp": datetime.now().isoformat(timespec='seconds'),
+            "environment": environment,
+            "threshold": args.threshold,
+            "results": results,
+            "comparison": comparison
+        }, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    if regressions:
+        print(f"성능 회귀 {len(regressions)}건 (기준값 대비 {args.threshold:.0%} 이상 느려짐): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
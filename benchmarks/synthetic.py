@@ -0,0 +1,161 @@
+"""
+벤치마크용 합성 데이터 생성 모듈 (PDF, 환자 페르소나)
+"""
+
+import random
+from pathlib import Path
+from typing import Dict, Any, List
+
+
+# 합성 문헌에 사용할 영어 의학 용어 (retriever.QUERY_TERM_EXPANSIONS와 겹치도록 구성)
+MEDICAL_VOCABULARY = """
+sudden sensorineural conductive hearing loss deafness tinnitus vertigo dizziness
+otalgia ear pain aural fullness otorrhea discharge otitis media effusion meniere
+endolymphatic hydrops otosclerosis acoustic neuroma vestibular schwannoma
+cholesteatoma tympanic membrane noise exposure presbycusis age congenital genetic
+hereditary family history ototoxic drug medication infection trauma unilateral
+bilateral newborn infant screening child pediatric audiometry evaluation treatment
+management cause etiology diagnosis hearing aid amplification cochlear implant
+patient symptoms onset progression steroid therapy prognosis recovery threshold
+frequency speech discrimination imaging magnetic resonance
+""".split()
+
+# 상담 시나리오 (환자 발화 순서)
+PERSONAS = [
+    {
+        "name": "돌발성 난청",
+        "utterances": [
+            "김철수이고 45살 남자입니다",
+            "어제 아침에 갑자기 오른쪽 귀가 잘 안 들려요",
+            "귀에서 삐 소리도 나고 약간 어지러워요",
+            "이런 적은 처음이에요",
+            "복용하는 약은 없습니다",
+        ],
+    },
+    {
+        "name": "메니에르병",
+        "utterances": [
+            "이영희, 52세 여성이에요",
+            "몇 달 전부터 빙빙 도는 어지러움이 반복돼요",
+            "그럴 때마다 왼쪽 귀가 먹먹하고 윙윙거려요",
+            "한 번 오면 몇 시간씩 가요",
+            "고혈압 약을 먹고 있어요",
+        ],
+    },
+    {
+        "name": "중이염",
+        "utterances": [
+            "7살 아이 엄마인데요, 아들이 귀가 아프다고 해요",
+            "사흘 전부터 왼쪽 귀가 아프고 열이 났어요",
+            "오늘 아침에 귀에서 고름이 나왔어요",
+            "감기에 걸린 지 일주일 됐어요",
+            "해열제만 먹였어요",
+        ],
+    },
+    {
+        "name": "소음성 난청",
+        "utterances": [
+            "박민수, 38살 남자입니다",
+            "공장에서 10년째 일하는데 양쪽 귀가 점점 안 들려요",
+            "조용한 곳에서도 귀에서 소리가 나요",
+            "몇 년에 걸쳐 서서히 나빠졌어요",
+            "따로 먹는 약은 없어요",
+        ],
+    },
+    {
+        "name": "노인성 난청",
+        "utterances": [
+            "76세 여자예요",
+            "요즘 사람들 말소리가 잘 안 들려요",
+            "양쪽 다 그렇고 텔레비전 소리를 크게 틀어요",
+            "몇 년 전부터 조금씩 심해졌어요",
+            "당뇨가 있어요",
+        ],
+    },
+]
+
+
+def generate_page_texts(num_pages: int, words_per_page: int = 400, seed: int = 0) -> List[str]:
+    """
+    고정 시드로 합성 문헌 페이지 텍스트 생성
+
+    Args:
+        num_pages: 페이지 수
+        words_per_page: 페이지당 단어 수
+        seed: 난수 시드
+
+    Returns:
+        페이지 텍스트 리스트
+    """
+    rng = random.Random(seed)
+    pages = []
+    for page_number in range(1, num_pages + 1):
+        words = [rng.choice(MEDICAL_VOCABULARY) for _ in range(words_per_page)]
+        pages.append(f"Chapter {page_number}. " + " ".join(words))
+    return pages
+
+
+def write_pdf(path: str, page_texts: List[str], line_length: int = 90) -> Path:
+    """
+    텍스트만 들어 있는 최소 PDF 파일 작성 (외부 라이브러리 없이 pypdf로 추출 가능한 형식)
+
+    Args:
+        path: 저장 경로
+        page_texts: 페이지별 텍스트 (ASCII)
+        line_length: 한 줄 글자 수
+
+    Returns:
+        저장된 파일 경로
+    """
+    num_pages = len(page_texts)
+    font_id = 3 + 2 * num_pages
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        (
+            "<< /Type /Pages /Kids [" +
+            " ".join(f"{3 + 2 * i} 0 R" for i in range(num_pages)) +
+            f"] /Count {num_pages} >>"
+        ).encode('ascii'),
+    ]
+    for i, text in enumerate(page_texts):
+        objects.append((
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {4 + 2 * i} 0 R >>"
+        ).encode('ascii'))
+        safe_text = text.replace("\\", "").replace("(", "").replace(")", "")
+        lines = [safe_text[j:j + line_length] for j in range(0, len(safe_text), line_length)]
+        content = (
+            "BT /F1 9 Tf 36 756 Td 11 TL " +
+            " ".join(f"({line}) '" for line in lines) +
+            " ET"
+        ).encode('ascii', 'replace')
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n".encode('ascii') + body + b"\nendobj\n"
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('ascii')
+    output += b"".join(f"{offset:010d} 00000 n \n".encode('ascii') for offset in offsets)
+    output += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref_offset}\n%%EOF\n"
+    ).encode('ascii')
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(bytes(output))
+    return path
+
+
+def build_synthetic_pdf(path: str, num_pages: int, words_per_page: int = 400, seed: int = 0) -> Path:
+    """합성 문헌 PDF 생성"""
+    return write_pdf(path, generate_page_texts(num_pages, words_per_page, seed))
+
+
+def get_persona(index: int) -> Dict[str, Any]:
+    """세션 번호에 해당하는 페르소나 (순환)"""
+    return PERSONAS[index % len(PERSONAS)]
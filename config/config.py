@@ -3,30 +3,115 @@
 """
 
 import os
+import threading
 from pathlib import Path
 
-# .env 파일 로드 (있는 경우)
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    pass  # python-dotenv가 없어도 환경 변수로 설정 가능
-
 # 프로젝트 루트 경로
 PROJECT_ROOT = Path(__file__).parent.parent
 
-# API 설정 - 환경 변수에서 가져오기
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
-
-if not OPENAI_API_KEY:
-    raise ValueError(
-        "OPENAI_API_KEY 환경 변수가 설정되지 않았습니다. "
-        "환경 변수를 설정하거나 .env 파일을 사용하세요. "
-        "예: export OPENAI_API_KEY='your-key' 또는 .env 파일에 OPENAI_API_KEY=your-key 추가"
-    )
 
-# 환경 변수에도 설정
-os.environ['OPENAI_API_KEY'] = OPENAI_API_KEY
+class Settings:
+    """
+    환경 변수(.env 파일 포함)에서 읽는 설정
+
+    get_settings()를 처음 호출할 때 한 번만 만들어집니다. 이 모듈을 불러오는 것만으로는
+    .env를 읽거나 환경 변수를 바꾸지 않으며, API 키 검증은 클라이언트를 처음 만들 때
+    validate()로 수행합니다.
+    """
+
+    def __init__(self, environ):
+        # LLM 백엔드 ("openai": OpenAI API, "fake": API 키 없이 동작하는 오프라인 가짜 백엔드)
+        self.llm_backend = environ.get('LLM_BACKEND', 'openai')
+        self.openai_api_key = environ.get('OPENAI_API_KEY', '')
+        # LLM 호출 카세트 ("off", "record": 모든 호출을 파일에 기록, "replay": 기록된 응답으로 API 없이 재생)
+        self.cassette_mode = environ.get('LLM_CASSETTE_MODE', 'off')
+        self.cassette_path = environ.get(
+            'LLM_CASSETTE_PATH', str(PROJECT_ROOT / "data" / "cassettes" / "llm_calls.jsonl")
+        )
+        # 재생 지연 ("recorded": 기록대로, "zero": 없음)
+        self.cassette_latency = environ.get('LLM_CASSETTE_LATENCY', 'recorded')
+
+    def validate(self):
+        """설정 검증 (잘못된 값이나 필요한 API 키가 없으면 ValueError)"""
+        if self.llm_backend not in ("openai", "fake"):
+            raise ValueError(f"알 수 없는 LLM_BACKEND입니다: {self.llm_backend}")
+        if self.cassette_mode not in ("off", "record", "replay"):
+            raise ValueError(f"알 수 없는 LLM_CASSETTE_MODE입니다: {self.cassette_mode}")
+        if self.cassette_latency not in ("recorded", "zero"):
+            raise ValueError(f"알 수 없는 LLM_CASSETTE_LATENCY입니다: {self.cassette_latency}")
+        if not self.openai_api_key and self.llm_backend != "fake" and self.cassette_mode != "replay":
+            raise ValueError(
+                "OPENAI_API_KEY 환경 변수가 설정되지 않았습니다. "
+                "환경 변수를 설정하거나 .env 파일을 사용하세요. "
+                "예: export OPENAI_API_KEY='your-key' 또는 .env 파일에 OPENAI_API_KEY=your-key 추가"
+            )
+
+
+_settings = None
+_settings_lock = threading.Lock()
+
+
+def _read_dotenv() -> dict:
+    """프로젝트 .env 파일 값 (python-dotenv가 없거나 파일이 없으면 빈 딕셔너리)"""
+    try:
+        from dotenv import dotenv_values
+    except ImportError:
+        return {}  # python-dotenv가 없어도 환경 변수로 설정 가능
+    return {key: value for key, value in dotenv_values(PROJECT_ROOT / ".env").items() if value is not None}
+
+
+def get_settings() -> Settings:
+    """
+    프로세스 전체에서 공유하는 설정 반환 (처음 호출할 때 .env와 환경 변수를 읽음)
+
+    환경 변수가 .env 값보다 우선합니다.
+    """
+    global _settings
+    with _settings_lock:
+        if _settings is None:
+            _settings = Settings({**_read_dotenv(), **os.environ})
+    return _settings
+
+
+# OpenAI 클라이언트 설정 (프로세스 전체에서 하나의 연결 풀 공유)
+OPENAI_TIMEOUT = 60.0  # 요청 1회 타임아웃 (초, 호출 시 timeout=으로 변경 가능)
+OPENAI_MAX_RETRIES = 3  # 429/5xx/연결 오류 시 지수 백오프 재시도 횟수
+OPENAI_MAX_CONCURRENCY = 16  # 프로세스 전체 동시 요청 수 상한
+
+# 가짜 백엔드 설정 (LLM_BACKEND="fake", 오프라인 테스트/부하 측정용)
+# 첫 토큰까지의 지연 분포 ("constant": median, "uniform": low~high, "lognormal": median, sigma)
+FAKE_LLM_LATENCY = {"distribution": "lognormal", "median": 0.8, "sigma": 0.5}
+FAKE_LLM_TOKEN_LATENCY = 0.02  # 스트리밍 청크 사이 지연 (초)
+FAKE_LLM_ERROR_RATE = 0.0  # 요청 실패 확률
+FAKE_LLM_SEED = 0
+
+# LLM 호출 스케줄러 (모델별 분당 요청 수/토큰 수 한도, 계정 등급에 맞게 조정)
+LLM_RATE_LIMITS = {
+    "gpt-4o": {"rpm": 500, "tpm": 30000},
+    "text-embedding-ada-002": {"rpm": 3000, "tpm": 1000000},
+}
+# 우선순위별 최대 대기 시간 (초, None이면 무기한). 초과한 요청은 포기(shed)
+# interactive: 의사 응답, report: 진단 분석/최종 보고서, extraction: 턴이 기다리는 정보 추출,
+# background: 백그라운드 정보 추출/대화 요약, prefetch: 선실행
+LLM_QUEUE_DEADLINES = {
+    "interactive": None,
+    "report": 120,
+    "extraction": None,
+    "background": 30,
+    "prefetch": 10,
+}
+
+# 요청 헤징 (첫 토큰이 늦은 호출에 같은 요청을 한 번 더 보내 먼저 도착한 응답 사용)
+HEDGING_ENABLED = False
+HEDGE_PRIORITIES = ("interactive", "report")  # 헤징할 호출 우선순위
+HEDGE_PERCENTILE = 95  # 최근 첫 토큰 지연(스트리밍이 아니면 전체 응답 시간)의 이 백분위수를 넘으면 중복 요청
+HEDGE_MIN_DELAY = 1.0  # 중복 요청 전 최소 대기 시간 (초)
+HEDGE_INITIAL_DELAY = 3.0  # 첫 토큰 지연 표본이 부족할 때 사용할 대기 시간 (초, 스트리밍이 아니면 헤징 안 함)
+HEDGE_MIN_SAMPLES = 20  # 백분위수 계산에 필요한 최소 표본 수
+HEDGE_WINDOW = 200  # 모델/스트리밍 여부별로 보관할 최근 지연 표본 수
+HEDGE_DEADLINE = 20.0  # 이 시간 안에 첫 토큰이 없으면 대체 모델로 요청 (None이면 사용 안 함)
+HEDGE_COMPLETION_DEADLINE = None  # 스트리밍이 아닌 호출의 대체 모델 기한 (초, 긴 분석이 있어 기본은 사용 안 함)
+HEDGE_FALLBACK_MODEL = "gpt-4o-mini"
 
 # 모델 설정
 GPT_MODEL = "gpt-4o"
@@ -37,6 +122,59 @@ CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 200
 RETRIEVER_K = 5
 
+# 검색 방식 ("keyword": BM25, "dense": 임베딩 벡터 유사도, "hybrid": 두 결과를 RRF로 결합)
+RETRIEVAL_MODE = "keyword"
+# hybrid 모드에서 검색기별로 가져올 후보 수
+HYBRID_CANDIDATES = 20
+# 임베딩 백엔드 ("openai": EMBEDDING_MODEL API 호출, "hashing": 오프라인 로컬 해싱 임베딩)
+EMBEDDING_BACKEND = "openai"
+EMBEDDING_BATCH_SIZE = 100
+HASHING_EMBEDDING_DIM = 512
+
+# PDF 추출 텍스트 캐시 디렉토리 (PDF 내용이 바뀌면 자동으로 다시 추출)
+CACHE_DIR = PROJECT_ROOT / "data" / "cache"
+
+# RAG 응답 캐시 (같은 질의를 모델에 반복 전송하지 않음)
+RESPONSE_CACHE_ENABLED = True
+RESPONSE_CACHE_SIZE = 256  # 최대 항목 수 (LRU 제거)
+RESPONSE_CACHE_TTL = 24 * 60 * 60  # 유효 시간 (초)
+RESPONSE_CACHE_PERSIST = False  # True이면 CACHE_DIR의 SQLite 파일에도 저장
+
+# 증상 분석 의미 기반 캐시 (임상적으로 같은 증상 요약이면 이전 분석 재사용)
+# 영향 부위, 나이대, 증상 집합은 정확히 같아야 하고 발생 시기/진행 양상만 유사도로 비교
+SEMANTIC_CACHE_ENABLED = False
+SEMANTIC_CACHE_THRESHOLD = 0.95  # 재사용할 최소 코사인 유사도 (발생 시기/진행 양상 텍스트)
+SEMANTIC_CACHE_SIZE = 256
+SEMANTIC_CACHE_TTL = 24 * 60 * 60
+
+# PDF 페이지 추출 병렬 프로세스 수 (1: 순차 추출, 0: CPU 코어 수만큼)
+PDF_EXTRACT_WORKERS = 1
+# 병렬 추출 시 작업 단위로 묶을 페이지 수
+PDF_EXTRACT_BATCH_PAGES = 16
+
+# 상담 설정
+# True이면 환자 정보 추출을 백그라운드에서 실행하고 의사 응답을 기다리지 않고 생성
+PIPELINED_EXTRACTION = False
+# True이면 나이/성별/부위/시기/흔한 증상은 규칙으로 추출하고, 필요한 턴에만 LLM 추출 호출
+LOCAL_EXTRACTION = True
+# True이면 의사 응답과 환자 정보 갱신을 한 번의 JSON 응답으로 받아 턴당 호출 수를 절반으로 줄임
+SINGLE_CALL_TURN = False
+# 의사 응답 요청의 대화 윈도우 (최근 턴은 그대로, 오래된 턴은 누적 요약으로 압축)
+CONTEXT_WINDOW_ENABLED = True
+CONTEXT_MAX_TOKENS = 6000  # 요청 메시지 전체 토큰 예산
+CONTEXT_KEEP_TURNS = 6  # 그대로 보낼 최근 턴 수
+CONTEXT_SUMMARY_BATCH_TURNS = 3  # 이만큼 턴이 더 쌓이면 한 번에 요약
+CONTEXT_FOLD_MARGIN_TOKENS = 500  # 예산 초과분이 이보다 클 때만 요약하고, 요약 후에는 예산보다 이만큼 아래로 유지
+# True이면 진단 단계 전환 직전 턴에 증상 분석을 백그라운드에서 미리 실행
+SPECULATIVE_PREFETCH = True
+# 백그라운드 작업(정보 추출, 증상 분석 선실행) 스레드 수 (프로세스 전체 공유)
+BACKGROUND_WORKERS = 4
+
+# 계측 설정 (단계별 소요 시간, 토큰 수, 캐시 적중 집계)
+METRICS_ENABLED = True
+# True이면 Streamlit 사이드바에 운영자용 성능 지표 패널 표시
+METRICS_SIDEBAR = False
+
 # 의사 AI 시스템 프롬프트
 DOCTOR_SYSTEM_PROMPT = """당신은 이비인후과 전문의입니다. 특히 청각 장애(hearing loss) 전문가입니다.
 
@@ -0,0 +1,240 @@
+"""
+토큰 예산 기반 대화 윈도우 모듈 (오래된 대화는 누적 요약으로 압축)
+"""
+
+import json
+import threading
+from typing import Dict, Any, List
+
+from config.config import (
+    GPT_MODEL,
+    CONTEXT_MAX_TOKENS,
+    CONTEXT_KEEP_TURNS,
+    CONTEXT_SUMMARY_BATCH_TURNS,
+    CONTEXT_FOLD_MARGIN_TOKENS
+)
+from core.llm.tokens import count_message_tokens
+from core.telemetry.metrics import span, record_error
+from core.patient.patient_management import build_patient_snapshot
+
+
+SUMMARY_PROMPT = """다음은 이비인후과 초진 상담의 이전 대화 요약과 그 이후의 대화입니다.
+기존 요약에 새 대화 내용을 반영하여 갱신된 요약을 작성하세요.
+
+- 환자가 말한 증상, 경과, 병력, 의사가 이미 한 질문과 설명을 빠짐없이 간결하게 정리하세요
+- 같은 내용을 반복하지 말고 300자 이내의 한국어로 작성하세요
+- 요약만 반환하세요
+
+기존 요약:
+{summary}
+
+새 대화:
+{conversation}
+"""
+
+
+class ConversationWindow:
+    """
+    의사 응답 요청에 보낼 메시지를 토큰 예산 안으로 구성
+
+    시스템 프롬프트와 최근 keep_turns 턴은 그대로 보내고, 그보다 오래된 턴은
+    누적 요약 하나로 압축합니다. 요약은 턴이 끝난 뒤(after_turn) 백그라운드에서
+    새로 밀려난 턴만 기존 요약에 반영하여 갱신하고, 요청 구성(build)은 LLM을
+    호출하지 않고 마지막으로 완료된 요약을 사용합니다. 환자 정보 요약은 항상 포함합니다.
+    """
+
+    def __init__(
+        self,
+        client,
+        max_tokens: int = CONTEXT_MAX_TOKENS,
+        keep_turns: int = CONTEXT_KEEP_TURNS,
+        summary_batch_turns: int = CONTEXT_SUMMARY_BATCH_TURNS,
+        fold_margin_tokens: int = CONTEXT_FOLD_MARGIN_TOKENS,
+        model: str = GPT_MODEL
+    ):
+        """
+        Args:
+            client: OpenAI 클라이언트 (요약 생성용)
+            max_tokens: 요청 메시지 전체의 토큰 예산
+            keep_turns: 그대로 보낼 최근 턴 수 (환자 발화 기준)
+            summary_batch_turns: 이만큼 턴이 더 쌓이면 한 번에 요약 (요약 호출 횟수 절감)
+            fold_margin_tokens: 예산 초과분이 이보다 클 때만 요약 (매 턴 요약 방지)
+            model: 요약에 사용할 모델
+        """
+        self.client = client
+        self.max_tokens = max_tokens
+        self.keep_turns = keep_turns
+        self.summary_batch_turns = summary_batch_turns
+        self.fold_margin_tokens = fold_margin_tokens
+        self.model = model
+        self.summary = ""
+        self.summarized_upto = 1  # messages[1:summarized_upto]는 요약에 반영됨
+        self._lock = threading.Lock()
+        self._generation = 0  # reset() 전에 시작한 요약 결과는 버림
+        self._fold_future = None
+
+    def build(self, messages: List[Dict[str, Any]], patient_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        요청용 메시지 리스트 구성 (LLM 호출 없음)
+
+        요약이 아직 반영되지 않아 예산을 넘으면 요약되지 않은 가장 오래된 턴부터
+        이번 요청에서만 제외합니다 (마지막 턴은 항상 유지).
+
+        Args:
+            messages: 전체 대화 기록 (messages[0]은 시스템 프롬프트)
+            patient_info: 환자 정보
+
+        Returns:
+            토큰 예산 안으로 압축된 메시지 리스트
+        """
+        with self._lock:
+            summary, summarized_upto = self.summary, self.summarized_upto
+
+        start = summarized_upto
+        while True:
+            request_messages = self._assemble(messages, patient_info, summary, start)
+            if count_message_tokens(request_messages) <= self.max_tokens:
+                return request_messages
+            user_indices = self._user_indices(messages, start)
+            if len(user_indices) <= 1:
+                return request_messages
+            start = user_indices[1]
+
+    def after_turn(self, messages: List[Dict[str, Any]], patient_info: Dict[str, Any], submit=None):
+        """
+        턴이 끝난 뒤 필요하면 오래된 턴을 요약
+
+        보존할 턴보다 summary_batch_turns 이상 쌓였거나 예산 초과분이 fold_margin_tokens를
+        넘을 때만 요약하며, 요약 중인 작업이 있으면 건너뜁니다.
+
+        Args:
+            messages: 전체 대화 기록
+            patient_info: 환자 정보
+            submit: submit(함수, *인자) → Future 형태의 백그라운드 실행 함수 (없으면 바로 실행)
+        """
+        with self._lock:
+            if self._fold_future is not None and not self._fold_future.done():
+                return
+            summary, summarized_upto, generation = self.summary, self.summarized_upto, self._generation
+
+        cut = self._fold_cut(messages, patient_info, summary, summarized_upto)
+        if cut is None:
+            return
+        if submit is None:
+            self._fold(messages, summarized_upto, cut, generation)
+            return
+        future = submit(self._fold, messages, summarized_upto, cut, generation)
+        with self._lock:
+            self._fold_future = future
+
+    def reset(self):
+        """요약 상태 초기화"""
+        with self._lock:
+            self.summary = ""
+            self.summarized_upto = 1
+            self._generation += 1
+            self._fold_future = None
+
+    @staticmethod
+    def _user_indices(messages: List[Dict[str, Any]], start: int) -> List[int]:
+        """messages[start:]의 환자 발화 인덱스"""
+        return [
+            index for index in range(start, len(messages))
+            if messages[index]['role'] == 'user'
+        ]
+
+    def _assemble(
+        self,
+        messages: List[Dict[str, Any]],
+        patient_info: Dict[str, Any],
+        summary: str,
+        start: int
+    ) -> List[Dict[str, Any]]:
+        """시스템 프롬프트 + 환자 정보 + 요약 + messages[start:]"""
+        snapshot = json.dumps(build_patient_snapshot(patient_info), ensure_ascii=False)
+        request_messages = [
+            messages[0],
+            {"role": "system", "content": f"[현재까지 파악된 환자 정보]\n{snapshot}"}
+        ]
+        if summary:
+            request_messages.append({"role": "system", "content": f"[이전 대화 요약]\n{summary}"})
+        # 진단 참조 결과 등 중간에 주입된 시스템 메시지는 요약하지 않고 유지
+        request_messages.extend(
+            msg for msg in messages[1:start] if msg['role'] == 'system'
+        )
+        request_messages.extend(messages[start:])
+        return request_messages
+
+    def _fold_cut(
+        self,
+        messages: List[Dict[str, Any]],
+        patient_info: Dict[str, Any],
+        summary: str,
+        summarized_upto: int
+    ):
+        """요약할 구간의 끝 인덱스 (요약이 필요 없으면 None)"""
+        user_indices = self._user_indices(messages, summarized_upto)
+        cut = None
+        # 보존할 턴보다 summary_batch_turns 이상 더 쌓였으면 오래된 턴을 한 번에 요약
+        if len(user_indices) >= self.keep_turns + self.summary_batch_turns:
+            cut = user_indices[-self.keep_turns]
+
+        # 예산 초과분이 여유분을 넘으면 예산보다 여유분만큼 아래로 내려갈 때까지 요약
+        tokens = count_message_tokens(self._assemble(messages, patient_info, summary, summarized_upto))
+        if tokens > self.max_tokens + self.fold_margin_tokens:
+            excess = tokens - (self.max_tokens - self.fold_margin_tokens)
+            removed = 0
+            for previous, index in zip(user_indices, user_indices[1:]):
+                removed += count_message_tokens([
+                    msg for msg in messages[previous:index] if msg['role'] != 'system'
+                ])
+                if cut is None or index > cut:
+                    cut = index
+                if removed >= excess:
+                    break
+        return cut
+
+    def _fold(self, messages: List[Dict[str, Any]], summarized_upto: int, cut: int, generation: int) -> bool:
+        """
+        messages[summarized_upto:cut]의 대화를 기존 요약에 반영
+
+        Returns:
+            요약 성공 여부 (실패 시 해당 대화는 그대로 유지)
+        """
+        with self._lock:
+            summary = self.summary
+        conversation = "\n".join(
+            f"{msg['role']}: {msg['content']}"
+            for msg in messages[summarized_upto:cut]
+            if msg['role'] in ('user', 'assistant')
+        )
+        if conversation:
+            with span("context_summary"):
+                try:
+                    response = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=[{
+                            "role": "user",
+                            "content": SUMMARY_PROMPT.format(
+                                summary=summary or "(없음)",
+                                conversation=conversation
+                            )
+                        }],
+                        temperature=0.2,
+                        max_tokens=400
+                    )
+                    summary = response.choices[0].message.content
+                except Exception as e:
+                    record_error(e)
+                    print(f"[대화 요약 오류: {e}]")
+                    return False
+            if not summary:
+                return False
+
+        with self._lock:
+            # 요약하는 동안 초기화되었거나 다른 요약이 반영되었으면 버림
+            if generation != self._generation or self.summarized_upto != summarized_upto:
+                return False
+            self.summary = summary.strip()
+            self.summarized_upto = cut
+        return True
@@ -2,35 +2,156 @@
 의료 상담 로직 모듈
 """
 
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+import json
+import re
 from datetime import datetime
-from typing import Dict, Any, List
-import sys
-from pathlib import Path
+from typing import Dict, Any, List, Iterator
 
-# 프로젝트 루트를 sys.path에 추가
-PROJECT_ROOT = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(PROJECT_ROOT))
-
-from config.config import DOCTOR_SYSTEM_PROMPT, GPT_MODEL, OPENAI_API_KEY
-from core.patient.patient_management import extract_patient_info, get_symptoms_summary
+from config.config import (
+    DOCTOR_SYSTEM_PROMPT,
+    GPT_MODEL,
+    PIPELINED_EXTRACTION,
+    LOCAL_EXTRACTION,
+    SINGLE_CALL_TURN,
+    CONTEXT_WINDOW_ENABLED,
+    SPECULATIVE_PREFETCH,
+    BACKGROUND_WORKERS
+)
+from core.patient.patient_management import (
+    EXTRACTION_JSON_FORMAT,
+    IncrementalPatientExtractor,
+    build_patient_snapshot,
+    extract_patient_info_locally,
+    merge_extracted_info,
+    get_clinical_fingerprint,
+    get_symptoms_summary
+)
+from core.llm.client import get_openai_client
+from core.llm.scheduler import call_priority, run_with_priority
+from core.telemetry.metrics import span, start_span, finish_span, use_span, record_cache_hit
 from core.rag.rag_system import RAGSystem
+from core.consultation.context_window import ConversationWindow
+
+
+# 백그라운드 정보 추출, 대화 요약, 증상 분석 선실행용 스레드 풀 (모든 세션 공유)
+_background_executor = ThreadPoolExecutor(
+    max_workers=BACKGROUND_WORKERS,
+    thread_name_prefix="consultation-background"
+)
+
+# 진단 단계로 전환하기 위한 최소 대화 횟수
+DIAGNOSIS_MIN_CONVERSATIONS = 3
+
+
+# 단일 호출 모드: 의사 응답과 환자 정보 갱신을 한 번의 JSON 응답으로 받기 위한 지시문
+SINGLE_CALL_INSTRUCTION = """[응답 형식 안내]
+응답은 반드시 다음 키를 가진 JSON 객체 하나로만 작성하세요. "reply"를 가장 먼저 작성하세요.
+- "reply": 환자에게 전할 의사의 답변 (평소와 같은 말투와 길이)
+- "patient_update": 환자의 마지막 발화에서 새로 확인되었거나 바뀐 환자 정보 (없으면 빈 객체)
+
+현재까지 파악된 환자 정보:
+{snapshot}
+
+patient_update에 사용할 수 있는 키와 형식:
+{schema}
+"""
+
+# 단일 호출 응답에서 의사 답변을 전혀 얻지 못했을 때 사용할 답변
+SINGLE_CALL_FALLBACK_REPLY = "죄송합니다, 잘 듣지 못했습니다. 방금 말씀하신 내용을 한 번만 더 말씀해 주시겠어요?"
+
+
+class _JsonReplyStreamDecoder:
+    """
+    스트리밍 중인 JSON 응답에서 "reply" 문자열 값만 디코딩
+    
+    단일 호출 모드에서도 답변을 토큰이 도착하는 대로 표시하기 위해 사용합니다.
+    """
+    
+    _REPLY_START = re.compile(r'"reply"\s*:\s*"')
+    _ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+    
+    def __init__(self):
+        self.buffer = ""
+        self.position = None  # reply 값에서 다음에 디코딩할 위치
+        self.finished = False
+    
+    def feed(self, text: str) -> str:
+        """받은 텍스트를 추가하고 새로 디코딩된 reply 텍스트 반환"""
+        self.buffer += text
+        if self.finished:
+            return ""
+        if self.position is None:
+            match = self._REPLY_START.search(self.buffer)
+            if not match:
+                return ""
+            self.position = match.end()
+        
+        decoded = []
+        buffer = self.buffer
+        while self.position < len(buffer):
+            char = buffer[self.position]
+            if char == '"':
+                self.finished = True
+                break
+            if char != '\\':
+                decoded.append(char)
+                self.position += 1
+                continue
+            # 이스케이프 시퀀스가 끝까지 도착하지 않았으면 다음 조각을 기다림
+            if self.position + 1 >= len(buffer):
+                break
+            escape = buffer[self.position + 1]
+            if escape == 'u':
+                if self.position + 6 > len(buffer):
+                    break
+                decoded.append(chr(int(buffer[self.position + 2:self.position + 6], 16)))
+                self.position += 6
+            else:
+                decoded.append(self._ESCAPES.get(escape, escape))
+                self.position += 2
+        return "".join(decoded)
 
 
 class MedicalConsultation:
     """의료 상담 클래스"""
     
-    def __init__(self, rag_system: RAGSystem):
+    def __init__(
+        self,
+        rag_system: RAGSystem,
+        pipelined_extraction: bool = PIPELINED_EXTRACTION,
+        local_extraction: bool = LOCAL_EXTRACTION,
+        single_call_turn: bool = SINGLE_CALL_TURN,
+        speculative_prefetch: bool = SPECULATIVE_PREFETCH,
+        client=None
+    ):
         """
         의료 상담 초기화
         
         Args:
             rag_system: RAG 시스템 인스턴스
+            pipelined_extraction: True이면 정보 추출을 의사 응답 생성과 동시에 실행
+            local_extraction: True이면 규칙 기반 추출 후 필요한 턴에만 LLM 추출 호출
+            single_call_turn: True이면 의사 응답과 환자 정보 갱신을 한 번의 호출로 받음
+            speculative_prefetch: True이면 진단 단계 전환이 예상될 때 증상 분석을 미리 실행
+            client: OpenAI 호환 클라이언트 (None이면 프로세스 공유 클라이언트)
         """
         self.rag_system = rag_system
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
+        self.client = client or get_openai_client()
+        self.pipelined_extraction = pipelined_extraction
+        self.local_extraction = local_extraction
+        self.single_call_turn = single_call_turn
+        self.speculative_prefetch = speculative_prefetch
         self.messages = [{"role": "system", "content": DOCTOR_SYSTEM_PROMPT}]
         self.diagnosis_stage = False
+        self.extractor = IncrementalPatientExtractor()
+        self._pending_extractions = []
+        self.context_window = ConversationWindow(self.client) if CONTEXT_WINDOW_ENABLED else None
+        # 마지막 증상 분석 결과와 당시 환자 정보 지문
+        self.symptoms_analysis = None
+        self.symptoms_analysis_fingerprint = None
+        self._prefetched_analysis = None  # (환자 정보 지문, Future)
+        self._conversation_count = 0
         
     def get_initial_greeting(self) -> str:
         """초기 인사말 반환"""
@@ -57,6 +178,172 @@ class MedicalConsultation:
         Returns:
             tuple: (의사 응답, 업데이트된 환자 정보, 진단 단계 여부)
         """
+        with span("turn"):
+            patient_info = self._prepare_turn(user_input, patient_info, conversation_count)
+            
+            # AI 응답 생성
+            with span("reply"):
+                response = self.client.chat.completions.create(**self._reply_request(patient_info))
+            
+            doctor_response = response.choices[0].message.content
+            if self.single_call_turn:
+                doctor_response = self._apply_single_call_response(doctor_response, patient_info)
+            self._finish_turn(doctor_response, patient_info)
+        
+        return doctor_response, patient_info, self.diagnosis_stage
+    
+    def process_user_message_stream(
+        self, 
+        user_input: str, 
+        patient_info: Dict[str, Any],
+        conversation_count: int
+    ) -> tuple[Iterator[str], Dict[str, Any], bool]:
+        """
+        사용자 메시지 처리 후 의사 응답을 토큰 단위로 스트리밍
+        
+        정보 추출과 진단 단계 전환은 반환 전에 끝나며, 응답 텍스트는
+        반환된 이터레이터를 끝까지 소비했을 때 대화 기록에 저장됩니다.
+        
+        Args:
+            user_input: 사용자 입력
+            patient_info: 환자 정보
+            conversation_count: 대화 횟수
+            
+        Returns:
+            tuple: (응답 토큰 이터레이터, 업데이트된 환자 정보, 진단 단계 여부)
+        """
+        # 턴/응답 스팬은 스트림 소비가 끝날 때 종료
+        turn_span = start_span("turn")
+        try:
+            with use_span(turn_span):
+                patient_info = self._prepare_turn(user_input, patient_info, conversation_count)
+                reply_span = start_span("reply")
+            with use_span(reply_span):
+                stream = self.client.chat.completions.create(
+                    **self._reply_request(patient_info),
+                    stream=True
+                )
+        except BaseException as e:
+            finish_span(turn_span, e)
+            raise
+        
+        def token_iterator():
+            try:
+                parts = []
+                streamed = []
+                decoder = _JsonReplyStreamDecoder() if self.single_call_turn else None
+                for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    token = chunk.choices[0].delta.content
+                    if not token:
+                        continue
+                    parts.append(token)
+                    if decoder is not None:
+                        token = decoder.feed(token)
+                    if token:
+                        streamed.append(token)
+                        yield token
+                finish_span(reply_span)
+                
+                # 응답이 끝까지 도착한 경우에만 대화 기록 저장
+                doctor_response = "".join(parts)
+                if self.single_call_turn:
+                    doctor_response = self._apply_single_call_response(doctor_response, patient_info)
+                    # 이미 표시한 부분은 다시 보내지 않고 나머지만 전달
+                    # (JSON이 잘렸으면 표시한 부분까지가 답변)
+                    shown = "".join(streamed)
+                    if doctor_response.startswith(shown):
+                        if doctor_response[len(shown):]:
+                            yield doctor_response[len(shown):]
+                    else:
+                        doctor_response = shown
+                with use_span(turn_span):
+                    self._finish_turn(doctor_response, patient_info)
+            except Exception as e:
+                finish_span(reply_span, e)
+                finish_span(turn_span, e)
+                raise
+            finally:
+                # 중간에 버려지면 스트림을 닫아 연결과 스케줄러 슬롯 반환
+                close = getattr(stream, 'close', None)
+                if close is not None:
+                    close()
+                finish_span(reply_span)
+                finish_span(turn_span)
+        
+        return token_iterator(), patient_info, self.diagnosis_stage
+    
+    def _reply_request(self, patient_info: Dict[str, Any]) -> Dict[str, Any]:
+        """의사 응답 생성 요청 파라미터"""
+        # 전체 대화 기록은 self.messages에 유지하고, 요청에는 토큰 예산 안의 윈도우만 전송
+        messages = self.messages
+        if self.context_window is not None:
+            messages = self.context_window.build(self.messages, patient_info)
+        
+        if not self.single_call_turn:
+            return {
+                "model": GPT_MODEL,
+                "messages": messages,
+                "temperature": 0.7,
+                "max_tokens": 600
+            }
+        
+        # 응답 형식 지시문은 이번 요청에만 붙이고 대화 기록에는 저장하지 않음
+        instruction = SINGLE_CALL_INSTRUCTION.format(
+            snapshot=json.dumps(build_patient_snapshot(patient_info), ensure_ascii=False),
+            schema=EXTRACTION_JSON_FORMAT
+        )
+        return {
+            "model": GPT_MODEL,
+            "messages": messages + [{"role": "system", "content": instruction}],
+            "temperature": 0.7,
+            "max_tokens": 800,
+            "response_format": {"type": "json_object"}
+        }
+    
+    def _apply_single_call_response(self, content: str, patient_info: Dict[str, Any]) -> str:
+        """
+        단일 호출 응답에서 환자 정보 갱신을 병합하고 의사 답변 반환
+        
+        JSON 파싱에 실패하면 (응답이 잘린 경우 등) 디코딩할 수 있는 reply 부분만 답변으로
+        사용하며, 파싱하지 못한 JSON 문자열을 답변이나 대화 기록으로 쓰지 않습니다.
+        """
+        try:
+            data = json.loads(content)
+        except ValueError:
+            print("[단일 호출 응답 파싱 오류: JSON 형식이 아닙니다]")
+            return self._recover_single_call_reply(content)
+        if not isinstance(data, dict) or not isinstance(data.get('reply'), str):
+            return self._recover_single_call_reply(content)
+        
+        patient_update = data.get('patient_update')
+        if isinstance(patient_update, dict):
+            merge_extracted_info(patient_info, patient_update)
+        return data['reply']
+    
+    @staticmethod
+    def _recover_single_call_reply(content: str) -> str:
+        """파싱하지 못한 단일 호출 응답에서 답변 복구"""
+        reply = _JsonReplyStreamDecoder().feed(content)
+        if reply.strip():
+            return reply
+        if not content.lstrip().startswith(("{", "[")):
+            return content  # 지시를 따르지 않은 일반 텍스트 답변
+        return SINGLE_CALL_FALLBACK_REPLY
+    
+    def _prepare_turn(
+        self,
+        user_input: str,
+        patient_info: Dict[str, Any],
+        conversation_count: int
+    ) -> Dict[str, Any]:
+        """사용자 메시지 기록, 정보 추출 및 진단 단계 전환 처리"""
+        previous_question = next(
+            (msg['content'] for msg in reversed(self.messages) if msg['role'] == 'assistant'),
+            None
+        )
+        
         # 사용자 메시지 추가
         self.messages.append({"role": "user", "content": user_input})
         patient_info['conversation_history'].append({
@@ -65,23 +352,49 @@ class MedicalConsultation:
             "timestamp": datetime.now().strftime('%H:%M:%S')
         })
         
-        # 정보 자동 추출
-        patient_info = extract_patient_info(
-            self.messages, 
-            patient_info, 
-            self.client
-        )
+        # 정보 자동 추출 (규칙 기반 추출로 충분한 턴은 LLM 호출 생략,
+        # 단일 호출 모드에서는 의사 응답과 함께 추출하므로 별도 호출 없음)
+        needs_llm_extraction = not self.single_call_turn
+        if self.local_extraction:
+            with span("extraction.local"):
+                local_info, needs_llm = extract_patient_info_locally(
+                    user_input, patient_info, previous_question
+                )
+                merge_extracted_info(patient_info, local_info)
+            needs_llm_extraction = needs_llm_extraction and needs_llm
+        
+        if self.pipelined_extraction:
+            # 완료된 이전 추출 결과를 병합하고, 이번 턴 추출은 백그라운드에서 시작
+            self._merge_completed_extractions(patient_info)
+            if needs_llm_extraction:
+                # 응답 대기 경로 밖이므로 의사 응답보다 낮은 우선순위로 요청
+                self._pending_extractions.append(_background_executor.submit(
+                    run_with_priority,
+                    "background",
+                    self.extractor.request,
+                    list(self.messages),
+                    build_patient_snapshot(patient_info),
+                    self.client
+                ))
+        elif needs_llm_extraction:
+            # 턴이 결과를 기다리므로 포기하지 않되, 다른 세션의 의사 응답보다는 뒤에 처리
+            patient_info = run_with_priority(
+                "extraction",
+                self.extractor.extract,
+                self.messages, 
+                patient_info, 
+                self.client
+            )
         
         # 충분한 정보가 수집되었는지 확인하여 진단 단계로 전환
-        if (not self.diagnosis_stage and 
-            patient_info['chief_complaint'] and 
-            patient_info['symptoms'] and
-            len(patient_info['symptoms']) >= 2 and
-            conversation_count >= 3):
+        self._conversation_count = conversation_count
+        if not self.diagnosis_stage and self._is_diagnosis_ready(patient_info, conversation_count):
+            # 규칙 기반 추출로 건너뛴 턴까지 반영한 뒤 진단 정보 조회
+            self._flush_extractions(patient_info)
             
             # RAG로 진단 정보 가져오기
-            symptoms_summary = get_symptoms_summary(patient_info)
-            diagnosis_result = self.rag_system.get_symptoms_analysis(symptoms_summary)
+            with span("diagnosis_rag"):
+                diagnosis_result = self.get_symptoms_analysis(patient_info)
             diagnosis_text = diagnosis_result['answer']
             
             # AI에게 진단 결과를 컨텍스트로 제공
@@ -97,25 +410,87 @@ class MedicalConsultation:
             self.messages.append({"role": "system", "content": context_message})
             self.diagnosis_stage = True
         
-        # AI 응답 생성
-        response = self.client.chat.completions.create(
-            model=GPT_MODEL,
-            messages=self.messages,
-            temperature=0.7,
-            max_tokens=600
-        )
-        
-        doctor_response = response.choices[0].message.content
-        
-        # 대화 기록 저장
+        return patient_info
+    
+    def _finish_turn(self, doctor_response: str, patient_info: Dict[str, Any]):
+        """의사 응답을 대화 기록에 저장"""
         self.messages.append({"role": "assistant", "content": doctor_response})
         patient_info['conversation_history'].append({
             "role": "doctor",
             "content": doctor_response,
             "timestamp": datetime.now().strftime('%H:%M:%S')
         })
+        if self.pipelined_extraction:
+            self._merge_completed_extractions(patient_info)
         
-        return doctor_response, patient_info, self.diagnosis_stage
+        # 오래된 대화 요약은 응답 경로 밖에서 실행하고 다음 턴부터 반영
+        if self.context_window is not None:
+            self.context_window.after_turn(self.messages, patient_info, self._submit_background)
+        
+        # 다음 턴에 진단 단계로 전환될 것으로 예상되면 증상 분석을 미리 시작
+        if (self.speculative_prefetch and not self.diagnosis_stage and
+                self._is_diagnosis_ready(patient_info, self._conversation_count + 1)):
+            self._prefetch_symptoms_analysis(patient_info)
+    
+    @staticmethod
+    def _submit_background(function, *args):
+        """백그라운드 우선순위로 공유 스레드 풀에서 실행"""
+        return _background_executor.submit(run_with_priority, "background", function, *args)
+    
+    @staticmethod
+    def _is_diagnosis_ready(patient_info: Dict[str, Any], conversation_count: int) -> bool:
+        """진단 단계 전환 조건 (주 증상, 2개 이상의 증상, 최소 대화 횟수)"""
+        return bool(
+            patient_info['chief_complaint'] and
+            len(patient_info['symptoms']) >= 2 and
+            conversation_count >= DIAGNOSIS_MIN_CONVERSATIONS
+        )
+    
+    def _prefetch_symptoms_analysis(self, patient_info: Dict[str, Any]):
+        """현재 환자 정보로 증상 분석을 백그라운드에서 시작 (이미 있으면 생략)"""
+        fingerprint = get_clinical_fingerprint(patient_info)
+        if fingerprint == self.symptoms_analysis_fingerprint:
+            return
+        if self._prefetched_analysis is not None:
+            if self._prefetched_analysis[0] == fingerprint:
+                return
+            self._prefetched_analysis[1].cancel()
+        self._prefetched_analysis = (fingerprint, _background_executor.submit(
+            run_with_priority,
+            "prefetch",
+            self.rag_system.get_symptoms_analysis,
+            get_symptoms_summary(patient_info)
+        ))
+    
+    def _merge_completed_extractions(self, patient_info: Dict[str, Any], wait: bool = False):
+        """
+        완료된 백그라운드 추출 결과를 요청 순서대로 patient_info에 병합
+        
+        Args:
+            patient_info: 환자 정보
+            wait: True이면 진행 중인 추출이 모두 끝날 때까지 대기
+        """
+        while self._pending_extractions:
+            future = self._pending_extractions[0]
+            if not wait and not future.done():
+                break
+            self._pending_extractions.pop(0)
+            extracted_info = future.result()
+            if extracted_info:
+                merge_extracted_info(patient_info, extracted_info)
+    
+    def _flush_extractions(self, patient_info: Dict[str, Any]):
+        """
+        진행 중인 추출을 기다리고, 아직 LLM 추출에 반영되지 않은 환자 발화가 있으면 추출
+        
+        단일 호출 모드에서는 매 턴 응답과 함께 추출하므로 생략합니다.
+        
+        Args:
+            patient_info: 환자 정보
+        """
+        self._merge_completed_extractions(patient_info, wait=True)
+        if not self.single_call_turn:
+            run_with_priority("extraction", self.extractor.extract, self.messages, patient_info, self.client)
     
     def generate_final_diagnosis(self, patient_info: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -127,17 +502,68 @@ class MedicalConsultation:
         Returns:
             진단 결과 딕셔너리
         """
-        if not patient_info['chief_complaint']:
-            return None
+        with span("final_diagnosis"):
+            # 진행 중인 추출과 규칙 기반 추출로 건너뛴 턴을 반영한 뒤 진단
+            self._flush_extractions(patient_info)
+            
+            if not patient_info['chief_complaint']:
+                return None
+            
+            # RAG 기반 진단 분석 (진단 단계 전환 이후 증상이 그대로면 재사용)
+            return self.get_symptoms_analysis(patient_info)
+    
+    def get_symptoms_analysis(self, patient_info: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        증상 분석 (환자 정보가 바뀐 경우에만 RAG 호출)
+        
+        증상 분석에 쓰이는 항목(get_clinical_fingerprint)이 이전 분석 때와 같으면
+        저장된 결과를 반환하고, 일부라도 바뀌었으면 다시 분석합니다.
+        
+        Args:
+            patient_info: 환자 정보
+            
+        Returns:
+            RAG 분석 결과 딕셔너리
+        """
+        fingerprint = get_clinical_fingerprint(patient_info)
+        if self.symptoms_analysis is not None and fingerprint == self.symptoms_analysis_fingerprint:
+            record_cache_hit("analysis")
+            return self.symptoms_analysis
         
-        # RAG 기반 진단 분석
-        symptoms_summary = get_symptoms_summary(patient_info)
-        diagnosis_result = self.rag_system.get_symptoms_analysis(symptoms_summary)
+        # 미리 시작한 분석이 같은 환자 정보로 만들어졌으면 그 결과 사용, 아니면 폐기
+        analysis = None
+        if self._prefetched_analysis is not None:
+            prefetched_fingerprint, future = self._prefetched_analysis
+            self._prefetched_analysis = None
+            if prefetched_fingerprint == fingerprint:
+                try:
+                    analysis = future.result()
+                    record_cache_hit("prefetch")
+                except Exception as e:
+                    print(f"[증상 분석 선실행 오류: {e}]")
+            else:
+                future.cancel()
         
-        return diagnosis_result
+        if analysis is None:
+            with call_priority("report"):
+                analysis = self.rag_system.get_symptoms_analysis(get_symptoms_summary(patient_info))
+        self.symptoms_analysis = analysis
+        self.symptoms_analysis_fingerprint = fingerprint
+        return self.symptoms_analysis
     
     def reset(self):
         """상담 상태 초기화"""
         self.messages = [{"role": "system", "content": DOCTOR_SYSTEM_PROMPT}]
         self.diagnosis_stage = False
+        # 이전 상담의 추출 결과가 새 환자 정보에 병합되지 않도록 폐기
+        self.extractor = IncrementalPatientExtractor()
+        self._pending_extractions = []
+        if self.context_window is not None:
+            self.context_window.reset()
+        self.symptoms_analysis = None
+        self.symptoms_analysis_fingerprint = None
+        if self._prefetched_analysis is not None:
+            self._prefetched_analysis[1].cancel()
+            self._prefetched_analysis = None
+        self._conversation_count = 0
 
@@ -0,0 +1,257 @@
+"""
+LLM 호출 기록/재생(카세트) 모듈
+
+record 모드에서는 모든 chat.completions / embeddings 요청과 응답, 지연 시간을
+JSON Lines 카세트 파일에 추가하고, replay 모드에서는 API 대신 카세트에서
+응답을 돌려줍니다. 요청은 모델, 메시지, 파라미터의 정규화된 해시로 찾습니다.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional
+
+# 해시에서 제외하는 인자 (응답 내용에 영향 없음)
+_IGNORED_PARAMS = frozenset({"stream", "stream_options", "timeout", "extra_headers"})
+
+
+class CassetteMiss(RuntimeError):
+    """replay 모드에서 카세트에 없는 요청"""
+
+
+def canonical_request_key(endpoint: str, kwargs: Dict[str, Any]) -> str:
+    """
+    요청 키 생성 (엔드포인트 + 모델, 메시지, 파라미터의 정규화 JSON 해시)
+
+    Args:
+        endpoint: "chat" 또는 "embeddings"
+        kwargs: API 호출 인자
+
+    Returns:
+        sha256 16진수 문자열
+    """
+    params = {key: value for key, value in kwargs.items() if key not in _IGNORED_PARAMS}
+    raw = json.dumps(
+        {"endpoint": endpoint, "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=str
+    )
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _completion_to_record(response) -> Dict[str, Any]:
+    choice = response.choices[0]
+    usage = getattr(response, 'usage', None)
+    return {
+        "content": choice.message.content,
+        "finish_reason": getattr(choice, 'finish_reason', None),
+        "usage": {
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens
+        } if usage is not None else None
+    }
+
+
+def _record_to_completion(record: Dict[str, Any]):
+    usage = record.get('usage')
+    return SimpleNamespace(
+        choices=[SimpleNamespace(
+            index=0,
+            message=SimpleNamespace(role="assistant", content=record['content'], tool_calls=None),
+            finish_reason=record.get('finish_reason')
+        )],
+        usage=SimpleNamespace(
+            prompt_tokens=usage['prompt_tokens'],
+            completion_tokens=usage['completion_tokens'],
+            total_tokens=usage['prompt_tokens'] + usage['completion_tokens']
+        ) if usage else None
+    )
+
+
+def _chunk(content: Optional[str], finish_reason: Optional[str] = None):
+    return SimpleNamespace(choices=[SimpleNamespace(
+        index=0,
+        delta=SimpleNamespace(content=content),
+        finish_reason=finish_reason
+    )])
+
+
+class Cassette:
+    """
+    JSON Lines 카세트 파일과 요청 키 색인
+
+    같은 키로 여러 번 기록된 요청은 기록된 순서대로 재생하고,
+    기록보다 많이 호출되면 마지막 응답을 반복합니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._index = {}  # 키 → 기록 리스트
+        self._replay_positions = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._index.setdefault(entry['key'], []).append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._index.values())
+
+    def append(self, entry: Dict[str, Any]):
+        """기록 추가 (파일 끝에 한 줄씩 저장)"""
+        with self._lock:
+            self._index.setdefault(entry['key'], []).append(entry)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def next_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """키에 해당하는 다음 재생 기록 (없으면 None)"""
+        with self._lock:
+            entries = self._index.get(key)
+            if not entries:
+                return None
+            position = self._replay_positions.get(key, 0)
+            self._replay_positions[key] = position + 1
+            return entries[min(position, len(entries) - 1)]
+
+
+class _CassetteEndpoint:
+    def __init__(self, owner: "CassetteClient", endpoint: str, create):
+        self._owner = owner
+        self._endpoint = endpoint
+        self._create = create
+
+    def create(self, **kwargs):
+        if self._owner.mode == "replay":
+            return self._owner.replay(self._endpoint, kwargs)
+        return self._owner.record(self._endpoint, self._create, kwargs)
+
+
+class CassetteClient:
+    """
+    OpenAI 호환 클라이언트를 감싸 호출을 기록하거나 카세트에서 재생
+
+    replay 모드에서는 감싼 클라이언트가 없어도 동작하며, 카세트에 없는
+    요청은 CassetteMiss를 발생시킵니다.
+    """
+
+    def __init__(self, client, cassette: Cassette, mode: str = "record", replay_latency: str = "recorded"):
+        """
+        Args:
+            client: OpenAI 호환 클라이언트 (replay 모드에서는 None 가능)
+            cassette: 기록/재생할 카세트
+            mode: "record" 또는 "replay"
+            replay_latency: "recorded"(기록된 지연 재현) 또는 "zero"(지연 없음)
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"지원하지 않는 카세트 모드입니다: {mode}")
+        if replay_latency not in ("recorded", "zero"):
+            raise ValueError(f"지원하지 않는 재생 지연 방식입니다: {replay_latency}")
+        if mode == "record" and client is None:
+            raise ValueError("record 모드에는 실제 클라이언트가 필요합니다.")
+        self.client = client
+        self.cassette = cassette
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self.chat = SimpleNamespace(completions=_CassetteEndpoint(
+            self, "chat", client.chat.completions.create if client is not None else None
+        ))
+        self.embeddings = _CassetteEndpoint(
+            self, "embeddings", client.embeddings.create if client is not None else None
+        )
+
+    def record(self, endpoint: str, create, kwargs: Dict[str, Any]):
+        """실제 호출 후 요청/응답/지연 기록"""
+        key = canonical_request_key(endpoint, kwargs)
+        start = time.perf_counter()
+        response = create(**kwargs)
+        if kwargs.get('stream'):
+            return self._record_stream(key, endpoint, kwargs, response, start)
+
+        elapsed = time.perf_counter() - start
+        if endpoint == "chat":
+            request = {k: v for k, v in kwargs.items() if k not in _IGNORED_PARAMS}
+            record = _completion_to_record(response)
+        else:
+            # 임베딩 입력은 분량이 커서 개수만 남김 (키에는 전체가 반영됨)
+            request = {"model": kwargs.get('model'), "inputs": len(kwargs['input'])}
+            record = {"embeddings": [
+                item.embedding for item in sorted(response.data, key=lambda item: item.index)
+            ]}
+        self.cassette.append({
+            "key": key,
+            "endpoint": endpoint,
+            "model": kwargs.get('model'),
+            "request": request,
+            "response": record,
+            "latency": {"first_token_s": elapsed, "total_s": elapsed},
+            "recorded_at": time.time()
+        })
+        return response
+
+    def _record_stream(self, key: str, endpoint: str, kwargs: Dict[str, Any], stream, start: float):
+        """스트림을 그대로 전달하고 끝까지 소비되면 기록 (중간에 닫히면 기록 안 함)"""
+        chunks = []
+        first_token_s = None
+        finish_reason = None
+        for chunk in stream:
+            if chunk.choices:
+                if first_token_s is None:
+                    first_token_s = time.perf_counter() - start
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    chunks.append(delta)
+                finish_reason = chunk.choices[0].finish_reason or finish_reason
+            yield chunk
+        total_s = time.perf_counter() - start
+        self.cassette.append({
+            "key": key,
+            "endpoint": endpoint,
+            "model": kwargs.get('model'),
+            "request": {k: v for k, v in kwargs.items() if k not in _IGNORED_PARAMS},
+            "response": {"content": "".join(chunks), "chunks": chunks, "finish_reason": finish_reason, "usage": None},
+            "latency": {"first_token_s": first_token_s if first_token_s is not None else total_s, "total_s": total_s},
+            "recorded_at": time.time()
+        })
+
+    def replay(self, endpoint: str, kwargs: Dict[str, Any]):
+        """카세트의 응답 반환 (스트리밍 요청이면 기록된 청크 단위로 전송)"""
+        key = canonical_request_key(endpoint, kwargs)
+        entry = self.cassette.next_entry(key)
+        if entry is None:
+            raise CassetteMiss(f"카세트에 없는 요청입니다 ({endpoint}, {kwargs.get('model')}, {key[:12]})")
+
+        record = entry['response']
+        latency = entry['latency'] if self.replay_latency == "recorded" else {"first_token_s": 0.0, "total_s": 0.0}
+        if kwargs.get('stream'):
+            return self._replay_stream(record, latency)
+
+        if latency['total_s'] > 0:
+            time.sleep(latency['total_s'])
+        if endpoint == "chat":
+            return _record_to_completion(record)
+        return SimpleNamespace(data=[
+            SimpleNamespace(index=index, embedding=embedding)
+            for index, embedding in enumerate(record['embeddings'])
+        ])
+
+    @staticmethod
+    def _replay_stream(record: Dict[str, Any], latency: Dict[str, float]):
+        """첫 청크까지 기록된 첫 토큰 지연, 나머지는 전체 지연을 청크 수로 나누어 재현"""
+        pieces: List[str] = record.get('chunks') or [record['content'] or ""]
+        if latency['first_token_s'] > 0:
+            time.sleep(latency['first_token_s'])
+        interval = max(latency['total_s'] - latency['first_token_s'], 0.0) / max(len(pieces) - 1, 1)
+        for index, piece in enumerate(pieces):
+            if index and interval > 0:
+                time.sleep(interval)
+            yield _chunk(piece)
+        yield _chunk(None, record.get('finish_reason') or "stop")
@@ -0,0 +1,210 @@
+"""
+프로세스 전체에서 공유하는 OpenAI 클라이언트 모듈
+"""
+
+import threading
+from types import SimpleNamespace
+
+from config.config import (
+    get_settings,
+    OPENAI_TIMEOUT,
+    OPENAI_MAX_RETRIES,
+    OPENAI_MAX_CONCURRENCY,
+    LLM_RATE_LIMITS,
+    LLM_QUEUE_DEADLINES,
+    HEDGING_ENABLED,
+    HEDGE_PRIORITIES,
+    HEDGE_PERCENTILE,
+    HEDGE_MIN_DELAY,
+    HEDGE_INITIAL_DELAY,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_WINDOW,
+    HEDGE_DEADLINE,
+    HEDGE_COMPLETION_DEADLINE,
+    HEDGE_FALLBACK_MODEL,
+    FAKE_LLM_LATENCY,
+    FAKE_LLM_TOKEN_LATENCY,
+    FAKE_LLM_ERROR_RATE,
+    FAKE_LLM_SEED
+)
+from core.llm.cassette import Cassette, CassetteClient
+from core.llm.fake_backend import FakeOpenAIClient
+from core.llm.hedging import RequestHedger
+from core.llm.scheduler import LLMScheduler, estimate_request_tokens
+from core.llm.tokens import count_tokens, count_message_tokens
+from core.telemetry.metrics import current_span, record_llm_usage
+
+
+class _Endpoint:
+    """스케줄러를 거쳐 호출하는 API 메서드 래퍼"""
+
+    def __init__(self, owner: "PooledOpenAIClient", create, hedger: RequestHedger = None):
+        self._owner = owner
+        self._create = create
+        self._hedger = hedger
+
+    def create(self, **kwargs):
+        """원래 API와 같은 인자로 호출 (timeout=으로 호출별 타임아웃 지정 가능)"""
+        if self._hedger is not None:
+            return self._hedger.create(self._call, **kwargs)
+        return self._call(**kwargs)
+
+    def _call(self, **kwargs):
+        return self._owner.call(self._create, **kwargs)
+
+
+class _ReleasingStream:
+    """
+    스트리밍 응답 래퍼
+
+    끝까지 읽거나 close()하면, 또는 한 번도 읽지 않고 버려져도 가비지 컬렉션 시
+    원래 스트림을 닫고 스케줄러 슬롯을 반환합니다. 스트림 응답에는 usage가
+    없으므로 받은 청크로 토큰 수를 추정하여 기록합니다.
+    """
+
+    def __init__(self, stream, scheduler: LLMScheduler, span, messages):
+        self._stream = stream
+        self._iterator = iter(stream)
+        self._scheduler = scheduler
+        self._span = span
+        self._messages = messages
+        self._completion_tokens = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            chunk = next(self._iterator)
+        except BaseException:
+            self.close()
+            raise
+        if chunk.choices and chunk.choices[0].delta.content:
+            self._completion_tokens += count_tokens(chunk.choices[0].delta.content)
+        return chunk
+
+    def close(self):
+        """원래 스트림을 닫고 슬롯 반환 (여러 번 호출해도 한 번만 반환)"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        try:
+            close = getattr(self._stream, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            self._scheduler.release()
+            record_llm_usage(self._span, count_message_tokens(self._messages), self._completion_tokens)
+
+    def __del__(self):
+        if not getattr(self, '_closed', True):
+            self.close()
+
+
+class PooledOpenAIClient:
+    """
+    우선순위 스케줄러를 거치는 OpenAI 클라이언트 래퍼
+
+    chat.completions.create / embeddings.create 인터페이스는 OpenAI 클라이언트와
+    같으며, 호출 우선순위는 scheduler.call_priority()로 지정합니다.
+    스트리밍 응답은 끝까지 소비되거나 닫히거나 버려질 때까지 슬롯을 점유합니다.
+    """
+
+    def __init__(self, client, scheduler: LLMScheduler, hedger: RequestHedger = None):
+        """
+        Args:
+            client: OpenAI 호환 클라이언트
+            scheduler: 동시 요청 수와 모델별 속도 한도를 관리하는 스케줄러
+            hedger: chat.completions 요청 헤징 (None이면 사용 안 함, 중복 요청도 스케줄러를 거침)
+        """
+        self.client = client
+        self.scheduler = scheduler
+        self.hedger = hedger
+        self.chat = SimpleNamespace(completions=_Endpoint(self, client.chat.completions.create, hedger))
+        self.embeddings = _Endpoint(self, client.embeddings.create)
+
+    def call(self, create, **kwargs):
+        """스케줄러의 허용을 받은 뒤 API 호출 (대기 기한 초과 시 LLMRequestShed)"""
+        self.scheduler.acquire(kwargs.get('model', ''), estimate_request_tokens(kwargs))
+        # 토큰 수는 호출 시점의 스팬에 기록 (스트림은 소비가 끝난 뒤 기록)
+        span = current_span()
+        try:
+            response = create(**kwargs)
+        except BaseException:
+            self.scheduler.release()
+            raise
+        if kwargs.get('stream'):
+            return _ReleasingStream(response, self.scheduler, span, kwargs['messages'])
+        self.scheduler.release()
+        usage = getattr(response, 'usage', None)
+        if usage is not None and 'messages' in kwargs:
+            record_llm_usage(span, usage.prompt_tokens, usage.completion_tokens)
+        elif 'messages' in kwargs:
+            record_llm_usage(span, count_message_tokens(kwargs['messages']), 0)
+        return response
+
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def get_openai_client() -> PooledOpenAIClient:
+    """
+    프로세스 전체에서 공유하는 OpenAI 클라이언트 반환
+
+    모든 세션이 하나의 HTTP 연결 풀(keep-alive)을 재사용하므로 세션마다
+    TLS 핸드셰이크를 반복하지 않습니다. 요청마다 OPENAI_TIMEOUT이 적용되고,
+    429/5xx/연결 오류는 OpenAI SDK가 지수 백오프로 OPENAI_MAX_RETRIES번까지
+    재시도합니다. LLM_BACKEND="fake"이면 API 대신 오프라인 가짜 백엔드를 사용합니다.
+    HEDGING_ENABLED이면 응답이 느린 호출에 중복 요청을 보내고
+    통계는 get_openai_client().hedger.stats()로 확인할 수 있습니다.
+    LLM_CASSETTE_MODE가 "record"이면 모든 호출을 LLM_CASSETTE_PATH에 기록하고,
+    "replay"이면 API 없이 기록된 응답을 재생합니다.
+
+    설정(API 키 등)은 처음 호출할 때 읽고 검증하며, openai 패키지도 이때 불러옵니다.
+    """
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            settings = get_settings()
+            settings.validate()
+            if settings.cassette_mode == "replay":
+                client = None
+            elif settings.llm_backend == "fake":
+                client = FakeOpenAIClient(
+                    latency=FAKE_LLM_LATENCY,
+                    token_latency=FAKE_LLM_TOKEN_LATENCY,
+                    error_rate=FAKE_LLM_ERROR_RATE,
+                    seed=FAKE_LLM_SEED
+                )
+            else:
+                from openai import OpenAI
+
+                client = OpenAI(
+                    api_key=settings.openai_api_key,
+                    timeout=OPENAI_TIMEOUT,
+                    max_retries=OPENAI_MAX_RETRIES
+                )
+            if settings.cassette_mode != "off":
+                client = CassetteClient(
+                    client, Cassette(settings.cassette_path), settings.cassette_mode, settings.cassette_latency
+                )
+            scheduler = LLMScheduler(LLM_RATE_LIMITS, OPENAI_MAX_CONCURRENCY, LLM_QUEUE_DEADLINES)
+            hedger = None
+            if HEDGING_ENABLED:
+                hedger = RequestHedger(
+                    percentile=HEDGE_PERCENTILE,
+                    min_delay=HEDGE_MIN_DELAY,
+                    initial_delay=HEDGE_INITIAL_DELAY,
+                    min_samples=HEDGE_MIN_SAMPLES,
+                    window=HEDGE_WINDOW,
+                    deadline=HEDGE_DEADLINE,
+                    completion_deadline=HEDGE_COMPLETION_DEADLINE,
+                    fallback_model=HEDGE_FALLBACK_MODEL,
+                    priorities=HEDGE_PRIORITIES
+                )
+            _shared_client = PooledOpenAIClient(client, scheduler, hedger)
+    return _shared_client
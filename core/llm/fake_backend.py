@@ -0,0 +1,284 @@
+"""
+오프라인 테스트/부하 측정용 가짜 OpenAI 백엔드 모듈
+
+API 키 없이 RAGSystem, MedicalConsultation, 환자 정보 추출이 사용하는
+chat.completions.create (스트리밍 포함)와 embeddings.create를 흉내 냅니다.
+응답은 결정적이며, 지연 분포와 오류율을 설정할 수 있습니다.
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+from core.llm.tokens import count_tokens, count_message_tokens
+
+
+class FakeBackendError(RuntimeError):
+    """주입된 가짜 API 오류"""
+
+
+class LatencyModel:
+    """
+    지연 분포
+
+    distribution:
+        "constant": 항상 median
+        "uniform": low ~ high 균등 분포
+        "lognormal": 중앙값 median, 로그 표준편차 sigma (긴 꼬리)
+    """
+
+    def __init__(
+        self,
+        distribution: str = "constant",
+        median: float = 0.0,
+        sigma: float = 0.5,
+        low: float = 0.0,
+        high: float = 0.0
+    ):
+        if distribution not in ("constant", "uniform", "lognormal"):
+            raise ValueError(f"알 수 없는 지연 분포입니다: {distribution}")
+        self.distribution = distribution
+        self.median = median
+        self.sigma = sigma
+        self.low = low
+        self.high = high
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "LatencyModel":
+        """{"distribution": ..., "median": ..., ...} 설정으로 생성 (None이면 지연 없음)"""
+        return cls(**(config or {}))
+
+    def sample(self, rng: random.Random) -> float:
+        """지연 시간 하나 샘플링 (초)"""
+        if self.distribution == "uniform":
+            return rng.uniform(self.low, self.high)
+        if self.distribution == "lognormal" and self.median > 0:
+            return rng.lognormvariate(0.0, self.sigma) * self.median
+        return self.median
+
+
+# 의사 응답 대본 (요청 내용의 해시로 결정적으로 선택)
+DOCTOR_REPLIES = (
+    "말씀 감사합니다. 그 증상이 처음 나타난 것은 언제쯤인가요?",
+    "한쪽 귀만 그런가요, 아니면 양쪽 귀 모두 그런가요?",
+    "귀에서 소리가 나거나 어지러운 증상도 함께 있으신가요?",
+    "증상이 갑자기 생겼나요, 아니면 서서히 심해졌나요?",
+    "최근에 큰 소음에 노출되거나 감기를 앓으신 적이 있나요?",
+    "현재 복용 중인 약이나 과거에 앓았던 귀 질환이 있으신가요?",
+)
+
+RAG_ANSWER = (
+    "제공된 문헌에 따르면 환자의 증상은 감각신경성 난청(sensorineural hearing loss)과 "
+    "관련될 수 있습니다. 돌발성 난청, 메니에르병, 소음성 난청 등을 감별해야 하며, "
+    "순음청력검사(pure tone audiometry)와 어음청력검사로 확인합니다."
+)
+
+SUMMARY_REPLY = "환자는 청력 저하와 이명을 호소하였으며, 의사는 발생 시기와 동반 증상을 확인하였습니다."
+
+
+class _Completions:
+    def __init__(self, backend: "FakeOpenAIClient"):
+        self._backend = backend
+
+    def create(self, **kwargs):
+        return self._backend.create_completion(**kwargs)
+
+
+class _Embeddings:
+    def __init__(self, backend: "FakeOpenAIClient"):
+        self._backend = backend
+
+    def create(self, **kwargs):
+        return self._backend.create_embedding(**kwargs)
+
+
+class FakeOpenAIClient:
+    """
+    OpenAI 클라이언트와 같은 인터페이스의 가짜 백엔드
+
+    script에 (정규식, 응답) 쌍을 넣으면 마지막 메시지가 정규식과 일치할 때
+    해당 응답(문자열 또는 요청 인자를 받는 함수)을 반환합니다. 일치하는 항목이
+    없으면 요청 종류(정보 추출 JSON, 단일 호출 JSON, 대화 요약, RAG 답변,
+    의사 응답)에 맞는 기본 응답을 만듭니다.
+    """
+
+    def __init__(
+        self,
+        latency: Optional[Dict[str, Any]] = None,
+        token_latency: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        script: Sequence[Tuple[str, Any]] = (),
+        embedding_dim: int = 1536
+    ):
+        """
+        Args:
+            latency: 첫 토큰까지의 지연 분포 설정 (LatencyModel 인자)
+            token_latency: 스트리밍 시 청크 사이 지연 (초)
+            error_rate: 요청이 FakeBackendError로 실패할 확률
+            seed: 지연/오류 샘플링 시드
+            script: (정규식, 응답) 쌍 리스트
+            embedding_dim: 임베딩 차원
+        """
+        self.latency = LatencyModel.from_config(latency)
+        self.token_latency = token_latency
+        self.error_rate = error_rate
+        self.script = [(re.compile(pattern), response) for pattern, response in script]
+        self.embedding_dim = embedding_dim
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._embedder = None
+        self.requests = []  # (종류, 모델) 기록
+        self.chat = SimpleNamespace(completions=_Completions(self))
+        self.embeddings = _Embeddings(self)
+
+    def _simulate_call(self, kind: str, model: str):
+        """요청 기록, 지연 및 오류 주입"""
+        with self._rng_lock:
+            delay = self.latency.sample(self._rng)
+            failed = self._rng.random() < self.error_rate
+            self.requests.append((kind, model))
+        if delay > 0:
+            time.sleep(delay)
+        if failed:
+            raise FakeBackendError(f"주입된 오류입니다 ({kind}, {model})")
+
+    def create_completion(self, **kwargs):
+        """chat.completions.create와 같은 형식의 응답 (stream=True이면 청크 이터레이터)"""
+        messages = kwargs['messages']
+        kind, content = self._respond(kwargs)
+        self._simulate_call(kind, kwargs.get('model', ''))
+
+        if kwargs.get('stream'):
+            return self._stream(content)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(
+                index=0,
+                message=SimpleNamespace(role="assistant", content=content, tool_calls=None),
+                finish_reason="stop"
+            )],
+            usage=SimpleNamespace(
+                prompt_tokens=count_message_tokens(messages),
+                completion_tokens=count_tokens(content),
+                total_tokens=count_message_tokens(messages) + count_tokens(content)
+            ),
+            model=kwargs.get('model', '')
+        )
+
+    def create_embedding(self, **kwargs):
+        """embeddings.create와 같은 형식의 응답 (해싱 임베딩)"""
+        texts = kwargs['input']
+        if isinstance(texts, str):
+            texts = [texts]
+        self._simulate_call("embedding", kwargs.get('model', ''))
+        if self._embedder is None:
+            from core.rag.embedding_store import HashingEmbedder
+            self._embedder = HashingEmbedder(self.embedding_dim)
+        vectors = self._embedder(list(texts))
+        return SimpleNamespace(
+            data=[SimpleNamespace(index=i, embedding=vector.tolist()) for i, vector in enumerate(vectors)],
+            usage=SimpleNamespace(prompt_tokens=sum(count_tokens(text) for text in texts))
+        )
+
+    def _stream(self, content: str):
+        """단어 단위 청크로 나누어 전송"""
+        pieces = re.findall(r"\S+\s*|\s+", content) or [""]
+        for i, piece in enumerate(pieces):
+            if i and self.token_latency > 0:
+                time.sleep(self.token_latency)
+            yield SimpleNamespace(choices=[SimpleNamespace(
+                index=0,
+                delta=SimpleNamespace(content=piece),
+                finish_reason=None
+            )])
+        yield SimpleNamespace(choices=[SimpleNamespace(
+            index=0,
+            delta=SimpleNamespace(content=None),
+            finish_reason="stop"
+        )])
+
+    def _respond(self, kwargs: Dict[str, Any]) -> Tuple[str, str]:
+        """요청 종류와 응답 텍스트 결정"""
+        messages = kwargs['messages']
+        last_content = messages[-1]['content']
+        for pattern, response in self.script:
+            if pattern.search(last_content):
+                return "script", response(kwargs) if callable(response) else response
+
+        system_text = "\n".join(msg['content'] for msg in messages if msg['role'] == 'system')
+        json_mode = (kwargs.get('response_format') or {}).get('type') == 'json_object'
+        if json_mode and '"patient_update"' in system_text:
+            update = _extract_from_text(_last_patient_message(messages), _parse_snapshot(system_text))
+            return "single_call", json.dumps(
+                {"reply": self._doctor_reply(messages), "patient_update": update},
+                ensure_ascii=False
+            )
+        if json_mode:
+            return "extraction", json.dumps(
+                _extract_from_text(last_content, _parse_snapshot(last_content)),
+                ensure_ascii=False
+            )
+        if "이전 대화 요약" in last_content:
+            return "summary", SUMMARY_REPLY
+        if "참고 문헌:" in system_text:
+            return "rag", RAG_ANSWER
+        return "reply", self._doctor_reply(messages)
+
+    @staticmethod
+    def _doctor_reply(messages: List[Dict[str, Any]]) -> str:
+        digest = hashlib.sha256(
+            json.dumps(messages, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        ).digest()
+        return DOCTOR_REPLIES[digest[0] % len(DOCTOR_REPLIES)]
+
+
+def _last_patient_message(messages: List[Dict[str, Any]]) -> str:
+    return next((msg['content'] for msg in reversed(messages) if msg['role'] == 'user'), "")
+
+
+_SNAPSHOT_PATTERN = re.compile(r"현재까지 파악된 환자 정보:\s*(\{.*\})\s*$", re.MULTILINE)
+
+
+def _parse_snapshot(text: str) -> Dict[str, Any]:
+    """프롬프트에 들어 있는 현재 환자 정보(build_patient_snapshot 결과)"""
+    match = _SNAPSHOT_PATTERN.search(text)
+    if not match:
+        return {}
+    try:
+        snapshot = json.loads(match.group(1))
+    except ValueError:
+        return {}
+    return snapshot if isinstance(snapshot, dict) else {}
+
+
+def _extract_from_text(text: str, snapshot: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    추출 프롬프트(또는 환자 발화)에서 환자 발화를 찾아 규칙 기반 추출로 JSON 응답 생성
+
+    실제 모델처럼 EXTRACTION_JSON_FORMAT 키를 사용하며, 프롬프트 계약대로
+    이미 파악된 주 증상(snapshot)은 바꾸지 않습니다.
+    """
+    from core.patient.patient_management import initialize_patient_info, extract_patient_info_locally
+
+    # 추출 프롬프트에는 "user: ..." 형식으로 대화가 들어 있음
+    utterances = re.findall(r"^user:\s*(.+)$", text, re.MULTILINE) or [text]
+    extracted = {}
+    for utterance in utterances:
+        local_info, _ = extract_patient_info_locally(utterance, initialize_patient_info())
+        for key, value in local_info.items():
+            if isinstance(value, list):
+                extracted[key] = extracted.get(key, []) + [v for v in value if v not in extracted.get(key, [])]
+            elif key == 'chief_complaint':
+                extracted.setdefault(key, value)
+            elif value:
+                extracted[key] = value
+    if (snapshot or {}).get('chief_complaint'):
+        extracted.pop('chief_complaint', None)
+    elif extracted.get('symptoms') and not extracted.get('chief_complaint'):
+        extracted['chief_complaint'] = extracted['symptoms'][0]
+    return extracted
@@ -0,0 +1,262 @@
+"""
+느린 LLM 호출 헤징 모듈 (중복 요청 및 기한 초과 시 대체 모델 사용)
+"""
+
+import contextvars
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Sequence, Tuple
+
+from core.llm.scheduler import current_priority
+
+
+# 빈 스트림 표시 (첫 청크 없이 끝난 경우)
+_EMPTY = object()
+
+
+class LatencyTracker:
+    """(모델, 스트리밍 여부)별 최근 지연 기록 (스트리밍은 첫 토큰, 아니면 전체 응답 시간)"""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: Tuple[str, bool], seconds: float):
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, key: Tuple[str, bool], percentile: float, min_samples: int) -> Optional[float]:
+        """
+        지연 백분위수 (초)
+
+        Returns:
+            표본이 min_samples보다 적으면 None
+        """
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if not samples or len(samples) < min_samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * percentile / 100))
+        return samples[index]
+
+
+class _ChainedStream:
+    """미리 받은 첫 청크와 나머지 스트림을 잇는 이터레이터 (닫거나 버리면 원래 스트림도 닫음)"""
+
+    def __init__(self, first_chunk, stream):
+        self._first_chunk = first_chunk
+        self._stream = stream
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._closed:
+            raise StopIteration
+        if self._first_chunk is not None:
+            chunk, self._first_chunk = self._first_chunk, None
+            if chunk is not _EMPTY:
+                return chunk
+            self.close()
+            raise StopIteration
+        return next(self._stream)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        close = getattr(self._stream, 'close', None)
+        if close is not None:
+            close()
+
+    def __del__(self):
+        if not getattr(self, '_closed', True):
+            self.close()
+
+
+class _Race:
+    """한 번의 헤징 호출에서 경쟁하는 요청들의 공유 상태"""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.launched = 0
+        self.errors = []
+        self.winner = None  # 먼저 첫 토큰을 받은 요청 번호 (-1: 대체 모델로 넘어감)
+        self.response = None
+        self.first_chunk = None
+
+
+class RequestHedger:
+    """
+    chat.completions.create 호출 헤징
+
+    요청이 최근 첫 토큰 지연의 percentile 백분위수(표본이 부족하면 initial_delay)
+    안에 첫 토큰을 받지 못하면 같은 요청을 한 번 더 보내고, 먼저 첫 토큰을 받은
+    쪽을 사용합니다(늦은 쪽은 닫음). deadline까지 어느 쪽도 응답하지 않으면
+    fallback_model로 다시 요청합니다. 스트리밍이 아닌 호출은 전체 응답 시간
+    표본을 따로 모아 판단하며, 표본이 min_samples만큼 쌓이기 전에는 중복 요청을
+    보내지 않고 대체 모델 기한은 completion_deadline을 따릅니다.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95,
+        min_delay: float = 1.0,
+        initial_delay: float = 3.0,
+        min_samples: int = 20,
+        window: int = 200,
+        deadline: Optional[float] = 20.0,
+        completion_deadline: Optional[float] = None,
+        fallback_model: Optional[str] = None,
+        priorities: Sequence[str] = ("interactive", "report")
+    ):
+        """
+        Args:
+            percentile: 중복 요청 기준 지연 백분위수
+            min_delay: 중복 요청 전 최소 대기 시간 (초)
+            initial_delay: 표본이 부족할 때 대기 시간 (초)
+            min_samples: 백분위수 계산에 필요한 최소 표본 수
+            window: 모델/스트리밍 여부별 보관할 지연 표본 수
+            deadline: 첫 토큰이 없으면 대체 모델로 넘어가는 시간 (초, None이면 사용 안 함)
+            completion_deadline: 스트리밍이 아닌 호출의 대체 모델 기한 (초, None이면 사용 안 함)
+            fallback_model: 대체 모델 (None이면 사용 안 함)
+            priorities: 헤징할 호출 우선순위 (그 외 호출은 그대로 전달)
+        """
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self.deadline = deadline
+        self.completion_deadline = completion_deadline
+        self.fallback_model = fallback_model
+        self.priorities = frozenset(priorities)
+        self.latencies = LatencyTracker(window)
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.hedged = 0
+        self.primary_wins = 0
+        self.hedge_wins = 0
+        self.fallbacks = 0
+
+    def hedge_delay(self, model: str, stream: bool = True) -> Optional[float]:
+        """중복 요청을 보내기 전 대기 시간 (초, None이면 중복 요청 안 함)"""
+        delay = self.latencies.percentile((model, stream), self.percentile, self.min_samples)
+        if delay is None:
+            # 전체 응답 시간은 답변 길이에 따라 크게 달라 표본 없이 추정하지 않음
+            if not stream:
+                return None
+            delay = self.initial_delay
+        return max(self.min_delay, delay)
+
+    def create(self, create, **kwargs):
+        """
+        헤징을 적용하여 호출
+
+        Args:
+            create: 실제 API 호출 함수
+            **kwargs: chat.completions.create 인자
+
+        Returns:
+            먼저 도착한 응답 (스트리밍이면 청크 이터레이터)
+        """
+        if current_priority() not in self.priorities:
+            return create(**kwargs)
+
+        model = kwargs.get('model', '')
+        stream = bool(kwargs.get('stream'))
+        self._count('requests')
+        race = _Race()
+        start = time.monotonic()
+        with race.condition:
+            self._launch(race, create, kwargs)
+            delay = self.hedge_delay(model, stream)
+            hedge_at = start + delay if delay is not None else None
+            deadline = self.deadline if stream else self.completion_deadline
+            deadline_at = None
+            if deadline is not None and self.fallback_model:
+                deadline_at = start + deadline
+
+            while race.winner is None and len(race.errors) < race.launched:
+                now = time.monotonic()
+                if race.launched == 1 and hedge_at is not None and now >= hedge_at:
+                    self._launch(race, create, kwargs)
+                    self._count('hedged')
+                    continue
+                if deadline_at is not None and now >= deadline_at:
+                    race.winner = -1
+                    break
+                wake_at = hedge_at if race.launched == 1 and hedge_at is not None else deadline_at
+                race.condition.wait(timeout=None if wake_at is None else max(wake_at - now, 0.001))
+
+            if race.winner is None:
+                # 보낸 요청이 모두 실패
+                raise race.errors[-1]
+            winner, response, first_chunk = race.winner, race.response, race.first_chunk
+
+        if winner == -1:
+            self._count('fallbacks')
+            return create(**dict(kwargs, model=self.fallback_model))
+        self._count('hedge_wins' if winner == 1 else 'primary_wins')
+        if kwargs.get('stream'):
+            return _ChainedStream(first_chunk, response)
+        return response
+
+    def _launch(self, race: _Race, create, kwargs: Dict[str, Any]):
+        """요청 하나를 별도 스레드에서 시작 (호출 우선순위 등 컨텍스트 유지, condition 보유 상태에서 호출)"""
+        index = race.launched
+        race.launched += 1
+        context = contextvars.copy_context()
+        threading.Thread(
+            target=context.run,
+            args=(self._attempt, race, index, create, kwargs),
+            name=f"llm-hedge-{index}",
+            daemon=True
+        ).start()
+
+    def _attempt(self, race: _Race, index: int, create, kwargs: Dict[str, Any]):
+        """요청을 보내고 첫 토큰(스트리밍이 아니면 전체 응답)을 받으면 경쟁 결과에 기록"""
+        start = time.monotonic()
+        try:
+            response = create(**kwargs)
+            first_chunk = None
+            if kwargs.get('stream'):
+                first_chunk = next(response, _EMPTY)
+        except Exception as e:
+            with race.condition:
+                race.errors.append(e)
+                race.condition.notify_all()
+            return
+
+        self.latencies.record((kwargs.get('model', ''), bool(kwargs.get('stream'))), time.monotonic() - start)
+        with race.condition:
+            if race.winner is None:
+                race.winner = index
+                race.response = response
+                race.first_chunk = first_chunk
+                race.condition.notify_all()
+                return
+        # 다른 요청이 이미 사용됨 → 스트림 연결 반환
+        close = getattr(response, 'close', None)
+        if kwargs.get('stream') and close is not None:
+            close()
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        """헤징 횟수/비율과 어느 요청이 이겼는지 통계"""
+        with self._stats_lock:
+            requests = self.requests
+            return {
+                "requests": requests,
+                "hedged": self.hedged,
+                "primary_wins": self.primary_wins,
+                "hedge_wins": self.hedge_wins,
+                "fallbacks": self.fallbacks,
+                "hedge_rate": self.hedged / requests if requests else 0.0,
+                "hedge_win_rate": self.hedge_wins / self.hedged if self.hedged else 0.0
+            }
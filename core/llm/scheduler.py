@@ -0,0 +1,228 @@
+"""
+우선순위 기반 LLM 호출 스케줄러 모듈 (모델별 요청/토큰 속도 제한)
+"""
+
+import contextvars
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+from core.llm.tokens import count_tokens, count_message_tokens
+
+
+# 우선순위 (작을수록 먼저 처리)
+PRIORITY_ORDER = {
+    "interactive": 0,  # 환자에게 보여줄 의사 응답
+    "report": 1,  # 진단 단계 RAG 분석, 최종 보고서
+    "extraction": 2,  # 턴이 기다리는 정보 추출 (응답보다 뒤, 포기하지 않음)
+    "background": 3,  # 백그라운드 정보 추출, 대화 요약
+    "prefetch": 4,  # 증상 분석 선실행
+}
+
+# 완료 토큰 수를 지정하지 않은 요청의 예상 출력 토큰
+DEFAULT_COMPLETION_TOKENS = 500
+
+_current_priority = contextvars.ContextVar("llm_priority", default="interactive")
+
+
+class LLMRequestShed(RuntimeError):
+    """대기 시간이 기한을 넘어 요청을 포기함"""
+
+
+@contextmanager
+def call_priority(priority: str):
+    """
+    이 블록 안에서 시작하는 LLM 호출의 우선순위 지정
+
+    Args:
+        priority: PRIORITY_ORDER의 키
+    """
+    if priority not in PRIORITY_ORDER:
+        raise ValueError(f"알 수 없는 우선순위입니다: {priority}")
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> str:
+    """현재 컨텍스트의 LLM 호출 우선순위"""
+    return _current_priority.get()
+
+
+def run_with_priority(priority: str, function, *args, **kwargs):
+    """우선순위를 지정하여 함수 실행 (백그라운드 스레드에 제출할 때 사용)"""
+    with call_priority(priority):
+        return function(*args, **kwargs)
+
+
+def estimate_request_tokens(kwargs: Dict[str, Any]) -> int:
+    """요청 인자로 입력 + 최대 출력 토큰 수 추정"""
+    if 'messages' in kwargs:
+        return count_message_tokens(kwargs['messages']) + kwargs.get('max_tokens', DEFAULT_COMPLETION_TOKENS)
+    texts = kwargs.get('input', "")
+    if isinstance(texts, str):
+        texts = [texts]
+    return sum(count_tokens(text) for text in texts)
+
+
+class TokenBucket:
+    """분당 한도를 가진 토큰 버킷"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """amount를 사용할 수 있을 때까지 남은 시간 (초)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float, now: float):
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+
+
+class _Waiter:
+    def __init__(self, rank: tuple, model: str, tokens: int):
+        self.rank = rank
+        self.model = model
+        self.tokens = tokens
+
+
+class LLMScheduler:
+    """
+    모든 LLM 호출이 거치는 프로세스 공용 스케줄러
+
+    모델별 분당 요청 수(rpm)/토큰 수(tpm) 버킷과 전체 동시 요청 수를 관리하며,
+    대기 중인 요청은 우선순위 순서로 허용합니다. 우선순위별 대기 기한을 넘긴
+    요청은 LLMRequestShed로 포기합니다.
+    """
+
+    def __init__(
+        self,
+        rate_limits: Dict[str, Dict[str, float]],
+        max_concurrency: int,
+        queue_deadlines: Optional[Dict[str, Optional[float]]] = None
+    ):
+        """
+        Args:
+            rate_limits: {모델: {"rpm": 분당 요청 수, "tpm": 분당 토큰 수}} (없는 모델은 제한 없음)
+            max_concurrency: 전체 동시 요청 수 상한
+            queue_deadlines: {우선순위: 최대 대기 시간(초) 또는 None(무기한)}
+        """
+        self.rate_limits = rate_limits
+        self.max_concurrency = max_concurrency
+        self.queue_deadlines = queue_deadlines or {}
+        self._buckets = {}
+        self._waiters = []
+        self._in_flight = 0
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self.admitted = {priority: 0 for priority in PRIORITY_ORDER}
+        self.shed = {priority: 0 for priority in PRIORITY_ORDER}
+
+    def _model_buckets(self, model: str) -> tuple:
+        if model not in self._buckets:
+            limits = self.rate_limits.get(model, {})
+            self._buckets[model] = (
+                TokenBucket(limits['rpm']) if limits.get('rpm') else None,
+                TokenBucket(limits['tpm']) if limits.get('tpm') else None
+            )
+        return self._buckets[model]
+
+    def _rate_wait(self, waiter: _Waiter, now: float) -> float:
+        """버킷 한도 때문에 기다려야 하는 시간"""
+        request_bucket, token_bucket = self._model_buckets(waiter.model)
+        wait = 0.0
+        if request_bucket:
+            wait = max(wait, request_bucket.wait_time(1, now))
+        if token_bucket:
+            wait = max(wait, token_bucket.wait_time(waiter.tokens, now))
+        return wait
+
+    def _can_proceed(self, waiter: _Waiter, now: float) -> bool:
+        if self._in_flight >= self.max_concurrency:
+            return False
+        for other in self._waiters:
+            if other.rank >= waiter.rank:
+                continue
+            # 같은 모델의 한도는 우선순위가 높은 요청에 양보하고,
+            # 다른 모델이라도 지금 실행 가능한 상위 요청이 있으면 양보
+            if other.model == waiter.model or self._rate_wait(other, now) == 0:
+                return False
+        return self._rate_wait(waiter, now) == 0
+
+    def acquire(self, model: str, tokens: int, priority: Optional[str] = None):
+        """
+        요청 허용까지 대기
+
+        Args:
+            model: 모델 이름
+            tokens: 예상 토큰 수
+            priority: 우선순위 (None이면 call_priority()로 지정된 값)
+
+        Raises:
+            LLMRequestShed: 우선순위별 대기 기한 초과
+        """
+        priority = priority or _current_priority.get()
+        deadline = self.queue_deadlines.get(priority)
+        start = time.monotonic()
+        waiter = _Waiter((PRIORITY_ORDER[priority], next(self._sequence)), model, tokens)
+
+        with self._condition:
+            self._waiters.append(waiter)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._can_proceed(waiter, now):
+                        break
+                    timeout = max(self._rate_wait(waiter, now), 0.01)
+                    if deadline is not None:
+                        remaining = start + deadline - now
+                        if remaining <= 0:
+                            self.shed[priority] += 1
+                            raise LLMRequestShed(
+                                f"LLM 요청이 {deadline}초 안에 처리되지 않아 포기했습니다 ({priority}, {model})"
+                            )
+                        timeout = min(timeout, remaining)
+                    self._condition.wait(timeout=min(timeout, 1.0))
+            finally:
+                self._waiters.remove(waiter)
+                self._condition.notify_all()
+
+            request_bucket, token_bucket = self._model_buckets(model)
+            if request_bucket:
+                request_bucket.consume(1, now)
+            if token_bucket:
+                token_bucket.consume(tokens, now)
+            self._in_flight += 1
+            self.admitted[priority] += 1
+
+    def release(self):
+        """요청 완료 (동시 요청 슬롯 반환)"""
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """우선순위별 허용/포기 횟수, 대기 중 요청 수, 진행 중 요청 수"""
+        with self._condition:
+            return {
+                "admitted": dict(self.admitted),
+                "shed": dict(self.shed),
+                "waiting": len(self._waiters),
+                "in_flight": self._in_flight
+            }
@@ -0,0 +1,51 @@
+"""
+토큰 수 계산 모듈
+"""
+
+from typing import Dict, Any, List
+
+# 메시지 1개당 역할/구분자 토큰
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_UNLOADED = object()
+_encoding = _UNLOADED
+
+
+def _get_encoding():
+    """
+    tiktoken 인코딩 (처음 사용할 때 불러옴)
+
+    tiktoken이 없거나 인코딩 파일을 받지 못하면 (오프라인 등) None을 저장하여
+    이후에는 다시 시도하지 않고 근사치를 사용합니다.
+    """
+    global _encoding
+    if _encoding is _UNLOADED:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except ImportError:
+            _encoding = None
+        except Exception as e:
+            print(f"[토크나이저 로드 오류: {e}, 근사치 사용]")
+            _encoding = None
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """
+    텍스트 토큰 수 계산
+
+    tiktoken이 없으면 UTF-8 바이트 수 / 3으로 근사합니다
+    (한글은 글자당 약 1토큰, 영어는 실제보다 약간 크게 추정).
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return max(1, len(text.encode('utf-8')) // 3)
+
+
+def count_message_tokens(messages: List[Dict[str, Any]]) -> int:
+    """메시지 리스트의 토큰 수 계산"""
+    return sum(count_tokens(msg['content']) + MESSAGE_OVERHEAD_TOKENS for msg in messages)
@@ -2,9 +2,14 @@
 환자 정보 관리 모듈
 """
 
+import hashlib
 import json
+import re
+import threading
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from core.telemetry.metrics import span, record_error
 
 
 def initialize_patient_info() -> Dict[str, Any]:
@@ -52,8 +57,49 @@ def extract_patient_info(conversation_history: list, patient_info: Dict[str, Any
     Returns:
         업데이트된 환자 정보
     """
+    extracted_info = request_patient_extraction(conversation_history, client)
+    if extracted_info:
+        merge_extracted_info(patient_info, extracted_info)
+    return patient_info
+
+
+# 추출 결과 JSON 형식 (전체 추출과 증분 추출에서 공통 사용)
+EXTRACTION_JSON_FORMAT = """{
+    "name": "이름",
+    "age": 나이,
+    "gender": "성별",
+    "chief_complaint": "주 증상",
+    "symptoms": ["증상1", "증상2"],
+    "onset": "발생 시기",
+    "duration": "지속 기간",
+    "affected_side": "영향 부위",
+    "severity": "심각도",
+    "additional_symptoms": ["추가증상1"],
+    "medical_history": ["병력1"],
+    "medications": ["약물1"],
+    "progression": "진행양상"
+}"""
+
+# 리스트로 누적되는 항목 (중복 제거 후 순서 유지)
+LIST_FIELDS = ("symptoms", "additional_symptoms", "medical_history", "medications")
+
+
+def request_patient_extraction(conversation_history: list, client) -> Optional[Dict[str, Any]]:
+    """
+    LLM으로 대화에서 환자 정보 추출 (patient_info는 변경하지 않음)
+    
+    백그라운드 스레드에서 실행할 수 있도록 추출 결과만 반환하며,
+    병합은 merge_extracted_info()로 호출한 쪽에서 수행합니다.
+    
+    Args:
+        conversation_history: 대화 기록
+        client: OpenAI 클라이언트
+        
+    Returns:
+        추출된 정보 딕셔너리 (추출 실패 시 None)
+    """
     if len(conversation_history) < 2:
-        return patient_info
+        return None
     
     # 최근 대화 내용 추출
     recent_conversation = "\n".join([
@@ -78,83 +124,382 @@ def extract_patient_info(conversation_history: list, patient_info: Dict[str, Any
 - 약물 복용
 
 정보가 언급되지 않은 항목은 null로 반환하세요.
-JSON만 반환하고 다른 텍스트는 포함하지 마세요.
 
 형식:
-{{
-    "name": "이름",
-    "age": 나이,
-    "gender": "성별",
-    "chief_complaint": "주 증상",
-    "symptoms": ["증상1", "증상2"],
-    "onset": "발생 시기",
-    "duration": "지속 기간",
-    "affected_side": "영향 부위",
-    "severity": "심각도",
-    "additional_symptoms": ["추가증상1"],
-    "medical_history": ["병력1"],
-    "progression": "진행양상"
-}}
+{EXTRACTION_JSON_FORMAT}
 """
+    return _call_extraction_model(extraction_prompt, client)
+
+
+def _call_extraction_model(extraction_prompt: str, client) -> Optional[Dict[str, Any]]:
+    """JSON 모드로 추출 모델 호출 (실패 시 None, 오류는 extraction 스팬에 기록)"""
+    with span("extraction"):
+        try:
+            response = client.chat.completions.create(
+                model="gpt-4o",
+                messages=[
+                    {"role": "system", "content": "당신은 의료 정보 추출 전문가입니다. 항상 JSON 객체로만 답합니다."},
+                    {"role": "user", "content": extraction_prompt}
+                ],
+                temperature=0.1,
+                response_format={"type": "json_object"}
+            )
+            
+            extracted_info = json.loads(response.choices[0].message.content)
+            return extracted_info if isinstance(extracted_info, dict) else None
+            
+        except Exception as e:
+            record_error(e)
+            print(f"[정보 추출 오류: {e}]")
+            return None
+
+
+def build_patient_snapshot(patient_info: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    추출 프롬프트용 현재 환자 정보 요약 (값이 있는 항목만)
     
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "당신은 의료 정보 추출 전문가입니다."},
-                {"role": "user", "content": extraction_prompt}
-            ],
-            temperature=0.1
-        )
-        
-        content = response.choices[0].message.content.strip()
+    Args:
+        patient_info: 환자 정보
         
-        # JSON 파싱
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif "```" in content:
-            content = content.split("```")[1].strip()
+    Returns:
+        EXTRACTION_JSON_FORMAT 키를 사용하는 간결한 딕셔너리
+    """
+    snapshot = {
+        "name": patient_info['basic_info'].get('name'),
+        "age": patient_info['basic_info'].get('age'),
+        "gender": patient_info['basic_info'].get('gender'),
+        "chief_complaint": patient_info.get('chief_complaint'),
+    }
+    snapshot.update(patient_info['symptom_details'])
+    for field in LIST_FIELDS:
+        snapshot[field] = list(patient_info.get(field, []))
+    return {key: value for key, value in snapshot.items() if value}
+
+
+class IncrementalPatientExtractor:
+    """
+    증분 환자 정보 추출기
+    
+    아직 처리하지 않은 대화만 현재 환자 정보 요약과 함께 보내고,
+    새로 확인되거나 바뀐 항목만 돌려받습니다.
+    """
+    
+    def __init__(self):
+        self.processed_count = 0  # 추출에 반영된 메시지 수
+        self._lock = threading.Lock()
+    
+    def request(self, conversation_history: list, snapshot: Dict[str, Any], client) -> Optional[Dict[str, Any]]:
+        """
+        새 대화에서 변경된 환자 정보 추출 (patient_info는 변경하지 않음)
         
-        extracted_info = json.loads(content)
+        Args:
+            conversation_history: 전체 대화 기록 (MedicalConsultation.messages)
+            snapshot: build_patient_snapshot() 결과
+            client: OpenAI 클라이언트
+            
+        Returns:
+            변경된 항목 딕셔너리 (새 환자 발화가 없거나 실패 시 None)
+        """
+        end = len(conversation_history)
+        new_messages = [
+            msg for msg in conversation_history[self.processed_count:end]
+            if msg['role'] in ('user', 'assistant')
+        ]
+        if not any(msg['role'] == 'user' for msg in new_messages):
+            return None
         
-        # 환자 정보 업데이트
-        if extracted_info.get('name'):
-            patient_info['basic_info']['name'] = extracted_info['name']
-        if extracted_info.get('age'):
-            patient_info['basic_info']['age'] = extracted_info['age']
-        if extracted_info.get('gender'):
-            patient_info['basic_info']['gender'] = extracted_info['gender']
-        if extracted_info.get('chief_complaint'):
-            patient_info['chief_complaint'] = extracted_info['chief_complaint']
-        if extracted_info.get('symptoms'):
-            for symptom in extracted_info['symptoms']:
-                if symptom not in patient_info['symptoms']:
-                    patient_info['symptoms'].append(symptom)
-        if extracted_info.get('onset'):
-            patient_info['symptom_details']['onset'] = extracted_info['onset']
-        if extracted_info.get('duration'):
-            patient_info['symptom_details']['duration'] = extracted_info['duration']
-        if extracted_info.get('affected_side'):
-            patient_info['symptom_details']['affected_side'] = extracted_info['affected_side']
-        if extracted_info.get('severity'):
-            patient_info['symptom_details']['severity'] = extracted_info['severity']
-        if extracted_info.get('progression'):
-            patient_info['symptom_details']['progression'] = extracted_info['progression']
-        if extracted_info.get('additional_symptoms'):
-            for symptom in extracted_info['additional_symptoms']:
-                if symptom not in patient_info['additional_symptoms']:
-                    patient_info['additional_symptoms'].append(symptom)
-        if extracted_info.get('medical_history'):
-            for history in extracted_info['medical_history']:
-                if history not in patient_info['medical_history']:
-                    patient_info['medical_history'].append(history)
+        new_conversation = "\n".join(
+            f"{msg['role']}: {msg['content']}" for msg in new_messages
+        )
+        extraction_prompt = f"""
+현재까지 파악된 환자 정보:
+{json.dumps(snapshot, ensure_ascii=False)}
+
+새 대화 내용:
+{new_conversation}
+
+새 대화에서 새로 확인되었거나 바뀐 환자 정보만 JSON 객체로 반환하세요.
+이미 파악된 정보와 같거나 언급되지 않은 항목은 생략하세요.
+리스트 항목에는 새로 추가할 값만 넣으세요.
+
+사용 가능한 키와 형식:
+{EXTRACTION_JSON_FORMAT}
+"""
+        extracted_info = _call_extraction_model(extraction_prompt, client)
+        if extracted_info is not None:
+            # 실패한 경우에는 다음 호출에서 같은 대화를 다시 보냄
+            with self._lock:
+                self.processed_count = max(self.processed_count, end)
+        return extracted_info
+    
+    def extract(self, conversation_history: list, patient_info: Dict[str, Any], client) -> Dict[str, Any]:
+        """새 대화에서 정보를 추출하여 patient_info에 병합"""
+        extracted_info = self.request(conversation_history, build_patient_snapshot(patient_info), client)
+        if extracted_info:
+            merge_extracted_info(patient_info, extracted_info)
+        return patient_info
+
+
+def _merge_unique(target: list, items) -> None:
+    """중복 없이 순서를 유지하며 target 리스트에 항목 추가"""
+    if not isinstance(items, list):
+        items = [items]
+    seen = set(target)
+    for item in items:
+        if not isinstance(item, str):
+            continue
+        item = item.strip()
+        if item and item not in seen:
+            seen.add(item)
+            target.append(item)
+
+
+def merge_extracted_info(patient_info: Dict[str, Any], extracted_info: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    추출된 정보를 환자 정보에 병합
+    
+    Args:
+        patient_info: 현재 환자 정보 (직접 수정됨)
+        extracted_info: request_patient_extraction() 결과
         
-    except Exception as e:
-        print(f"[정보 추출 오류: {e}]")
+    Returns:
+        업데이트된 환자 정보
+    """
+    # 환자 정보 업데이트
+    for field in ('name', 'age', 'gender'):
+        if extracted_info.get(field):
+            patient_info['basic_info'][field] = extracted_info[field]
+    if extracted_info.get('chief_complaint'):
+        patient_info['chief_complaint'] = extracted_info['chief_complaint']
+    for field in ('onset', 'duration', 'affected_side', 'severity', 'progression'):
+        if extracted_info.get(field):
+            patient_info['symptom_details'][field] = extracted_info[field]
+    for field in LIST_FIELDS:
+        if extracted_info.get(field):
+            _merge_unique(patient_info[field], extracted_info[field])
     
     return patient_info
 
 
+# ── 로컬 규칙 기반 추출 (LLM 호출 없이 처리 가능한 턴 판별) ──
+
+# 자기소개로 말한 나이만 인정 ("20살 때부터", "30세에 처음"처럼 시점을 가리키면 제외)
+_AGE_PATTERN = re.compile(
+    r"(?<!\d)(\d{1,3})\s*(?:세|살)(?!\s*(?:때|에|부터|까지|무렵|즈음|쯤|전|이후|짜리|정도))"
+)
+# "남자입니다", "여자예요"처럼 자기를 가리킬 때만 성별로 봄 ("남자 목소리", "여자분" 제외)
+_GENDER_PATTERNS = (
+    ("남성", re.compile(r"(?:남자|남성)(?=\s*(?:입니다|이에요|예요|이고|인데|고|요|[,.!?]|$))")),
+    ("여성", re.compile(r"(?:여자|여성)(?=\s*(?:입니다|이에요|예요|이고|인데|고|요|[,.!?]|$))")),
+)
+# 가족/지인의 증상을 전하는 발화는 규칙으로 처리하지 않고 LLM 사용
+_THIRD_PARTY_PATTERN = re.compile(
+    r"친구|남편|아내|와이프|아들|딸|엄마|아빠|어머니|아버지|아이가|애가|할머니|할아버지|"
+    r"[가-힣](?:대요|래요|답니다|랍니다)"
+)
+_GENDER_SHORT_PATTERN = re.compile(r"^\s*(남|여)\s*(?:입니다|이에요|예요|요)?\s*[.!]?\s*$")
+_SIDE_PATTERNS = (
+    ("양쪽", re.compile(r"양쪽|양측|두 귀|둘 다")),
+    ("왼쪽", re.compile(r"왼쪽|왼 귀|좌측")),
+    ("오른쪽", re.compile(r"오른쪽|오른 귀|우측")),
+)
+_ONSET_PATTERN = re.compile(
+    r"(?:\d+|한|두|세|네|다섯|몇|며칠)\s*(?:시간|일|주일|주|개월|달|년)\s*(?:전|째)"
+    r"|그저께|어제|오늘 아침|지난\s*(?:주|달|해)"
+)
+# 부정 표현 ("안 어지러워요", "소리는 안 나요", "두통은 전혀 없습니다")
+# 증상 표현("안 들려" 등)을 지운 뒤 같은 절 안에 있으면 증상으로 보지 않고 LLM 사용
+_NEGATION_CUE_PATTERN = re.compile(r"(?<![가-힣])(?:안|못)(?=\s|$)|전혀|없|아니|않")
+_CLAUSE_BOUNDARY_PATTERN = re.compile(r"[.,!?\n]|(?<=[가-힣])(?:고|지만|는데|은데)(?=\s)")
+_CONFIRMATION_PATTERN = re.compile(
+    r"^\s*(?:네|예|응|맞아요|맞습니다|그렇습니다|그래요|있어요|있습니다)\s*[.!~]*\s*$"
+)
+_DENIAL_PATTERN = re.compile(
+    r"^\s*(?:아니요|아니오|아뇨|없어요|없습니다|모르겠어요|모르겠습니다|괜찮아요)\s*[.!~]*\s*$"
+)
+# 규칙으로 설명된 표현 밖에 남아도 정보가 없는 단어 (끝의 조사를 떼고도 비교)
+_FUNCTION_WORDS = frozenset({
+    "네", "예", "음", "아", "저", "제가", "좀", "조금", "많이", "꽤", "계속", "너무", "아주",
+    "정말", "진짜", "그리고", "그냥", "요즘", "지금", "정도", "부터", "것", "거", "귀", "쪽", "다",
+    "있어요", "있습니다", "있고", "있는데", "있었어요", "있었습니다", "나요", "납니다",
+    "해요", "합니다", "돼요", "됐어요", "입니다", "이에요", "예요", "이요", "같아요", "같습니다",
+    "안녕하세요", "선생님",
+})
+_TRAILING_PARTICLE_PATTERN = re.compile(r"(?:에서|은|는|이|가|도|에|요)$")
+
+# 표준 증상명 → 환자 표현
+SYMPTOM_LEXICON = {
+    "이명": ("이명", "귀울림", "귀에서 소리", "삐 소리", "윙윙", "삐-"),
+    "청력 저하": (
+        "난청", "잘 안 들", "안 들려", "안 들리", "안 들린", "잘 못 들", "못 듣", "못 들",
+        "들리지 않", "들리지가 않", "청력이 떨어", "소리가 작게"
+    ),
+    "어지러움": ("어지러", "어지럽", "어지럼", "현기증", "빙빙"),
+    "이충만감": ("먹먹", "막힌 느낌", "꽉 찬 느낌", "이충만감"),
+    "이통": ("이통", "귀가 아파", "귀가 아프", "귀 통증"),
+    "이루": ("이루", "진물", "고름", "분비물"),
+    "두통": ("두통", "머리가 아파", "머리가 아프"),
+    "구역/구토": ("구토", "토했", "메스꺼", "구역"),
+}
+_SYMPTOM_PATTERNS = tuple(
+    (symptom, re.compile("|".join(re.escape(v) for v in variants)))
+    for symptom, variants in SYMPTOM_LEXICON.items()
+)
+
+
+def _find_symptom_spans(text: str) -> list:
+    """증상 사전과 일치하는 (표준 증상명, (시작, 끝)) 리스트"""
+    return [
+        (symptom, symptom_match.span())
+        for symptom, pattern in _SYMPTOM_PATTERNS
+        for symptom_match in pattern.finditer(text)
+    ]
+
+
+def _negated_clauses(text: str, symptom_spans: list) -> list:
+    """
+    부정 표현이 들어 있는 절의 (시작, 끝) 리스트
+    
+    "안 들려"처럼 부정형 자체가 증상 표현인 경우를 제외하기 위해
+    증상 표현을 지운 텍스트에서 부정 표현을 찾습니다.
+    """
+    masked = list(text)
+    for _, (start, end) in symptom_spans:
+        masked[start:end] = [" "] * (end - start)
+    masked = "".join(masked)
+    boundaries = [0] + [m.end() for m in _CLAUSE_BOUNDARY_PATTERN.finditer(masked)] + [len(masked)]
+    return [
+        (start, end) for start, end in zip(boundaries, boundaries[1:])
+        if _NEGATION_CUE_PATTERN.search(masked[start:end])
+    ]
+
+
+def _unexplained_words(text: str, matched_spans: list) -> list:
+    """규칙으로 처리한 표현과 겹치지 않고 정보가 없는 단어도 아닌 단어 리스트"""
+    words = []
+    for word_match in re.finditer(r"\S+", text):
+        start, end = word_match.span()
+        if any(span_start < end and start < span_end for span_start, span_end in matched_spans):
+            continue
+        word = re.sub(r"[\W_]", "", word_match.group(0))
+        if word and word not in _FUNCTION_WORDS and _TRAILING_PARTICLE_PATTERN.sub("", word) not in _FUNCTION_WORDS:
+            words.append(word)
+    return words
+
+
+def extract_patient_info_locally(
+    message: str,
+    patient_info: Dict[str, Any],
+    previous_question: Optional[str] = None
+) -> tuple[Dict[str, Any], bool]:
+    """
+    정규식과 증상 사전으로 환자 발화에서 정보 추출 (LLM 호출 없음)
+    
+    나이, 성별, 영향 부위, 발생 시기, 흔한 증상을 처리하고
+    이번 턴에 LLM 추출이 필요한지 판단합니다. 규칙으로 처리하지 못한
+    단어가 하나라도 남으면 LLM 추출이 필요한 것으로 봅니다.
+    
+    Args:
+        message: 환자 발화
+        patient_info: 현재 환자 정보 (변경하지 않음)
+        previous_question: 직전 의사 발화 (짧은 긍정/부정 답변 해석용)
+        
+    Returns:
+        tuple: (merge_extracted_info()에 넘길 추출 결과, LLM 추출 필요 여부)
+    """
+    extracted = {}
+    matched_spans = []
+    needs_llm = False
+    
+    # 짧은 긍정/부정 답변: 직전 질문이 증상 하나를 긍정형으로 물었을 때만 반영하고 LLM은 생략
+    # ("이명은 없으시죠?"에 대한 "네"나 여러 증상을 한 번에 물은 질문은 LLM이 해석)
+    if _CONFIRMATION_PATTERN.match(message):
+        if previous_question:
+            symptom_spans = _find_symptom_spans(previous_question)
+            symptoms = list(dict.fromkeys(symptom for symptom, _ in symptom_spans))
+            if len(symptoms) > 1 or (symptoms and _negated_clauses(previous_question, symptom_spans)):
+                return extracted, True
+            if symptoms:
+                extracted['symptoms'] = symptoms
+        return extracted, False
+    if _DENIAL_PATTERN.match(message):
+        return extracted, False
+    
+    # 다른 사람에 대한 이야기면 나이/성별/증상을 환자 것으로 볼 수 없음
+    if _THIRD_PARTY_PATTERN.search(message):
+        return extracted, True
+    
+    # 나이/성별은 비어 있을 때만 채우고, 기존 값과 다르면 정정인지 LLM이 판단
+    basic_info = patient_info['basic_info']
+    age_match = _AGE_PATTERN.search(message)
+    if age_match:
+        matched_spans.append(age_match.span())
+        age = int(age_match.group(1))
+        if not basic_info.get('age'):
+            extracted['age'] = age
+        elif basic_info['age'] != age:
+            needs_llm = True
+    
+    gender = None
+    for candidate, pattern in _GENDER_PATTERNS:
+        gender_match = pattern.search(message)
+        if gender_match:
+            gender = candidate
+            matched_spans.append(gender_match.span())
+            break
+    else:
+        short_match = _GENDER_SHORT_PATTERN.match(message)
+        if short_match:
+            gender = "남성" if short_match.group(1) == "남" else "여성"
+            matched_spans.append(short_match.span())
+    if gender:
+        if not basic_info.get('gender'):
+            extracted['gender'] = gender
+        elif basic_info['gender'] != gender:
+            needs_llm = True
+    
+    # 여러 부위를 비교하는 발화("오른쪽보다 왼쪽이")는 LLM이 해석
+    sides = []
+    for side, pattern in _SIDE_PATTERNS:
+        for side_match in pattern.finditer(message):
+            sides.append(side)
+            matched_spans.append(side_match.span())
+    if len(set(sides)) == 1:
+        extracted['affected_side'] = sides[0]
+    elif sides:
+        needs_llm = True
+    
+    onset_match = _ONSET_PATTERN.search(message)
+    if onset_match:
+        extracted['onset'] = onset_match.group(0)
+        matched_spans.append(onset_match.span())
+    
+    symptom_spans = _find_symptom_spans(message)
+    negated = _negated_clauses(message, symptom_spans)
+    symptoms = []
+    for symptom, (start, end) in symptom_spans:
+        matched_spans.append((start, end))
+        in_negated_clause = any(clause_start <= start < clause_end for clause_start, clause_end in negated)
+        if not in_negated_clause and symptom not in symptoms:
+            symptoms.append(symptom)
+    if symptoms:
+        extracted['symptoms'] = symptoms
+        if not patient_info.get('chief_complaint'):
+            extracted['chief_complaint'] = symptoms[0]
+    
+    # 부정 표현이 있으면 무엇을 부정했는지 LLM이 판단
+    if negated or needs_llm:
+        return extracted, True
+    
+    # 이름은 규칙으로 추출하지 않으므로, 이름을 묻는 단계에서는 LLM 사용
+    if not patient_info['basic_info'].get('name'):
+        if previous_question is None or "성함" in previous_question or "이름" in previous_question:
+            return extracted, True
+    
+    # 규칙으로 설명되지 않는 단어가 남아 있으면 LLM 사용 ("당뇨가 있어요", "갑자기 생겼어요")
+    return extracted, bool(_unexplained_words(message, matched_spans))
+
+
 def generate_patient_summary(patient_info: Dict[str, Any]) -> str:
     """환자 정보 요약 생성"""
     summary = f"""
@@ -235,3 +580,32 @@ def get_symptoms_summary(patient_info: Dict[str, Any]) -> str:
 """
     return symptoms_summary
 
+
+# 증상 분석(get_symptoms_summary)에 영향을 주는 항목
+CLINICAL_FIELDS = {
+    "age": lambda info: info['basic_info'].get('age'),
+    "chief_complaint": lambda info: info.get('chief_complaint'),
+    "symptoms": lambda info: info['symptoms'],
+    "onset": lambda info: info['symptom_details'].get('onset'),
+    "affected_side": lambda info: info['symptom_details'].get('affected_side'),
+    "progression": lambda info: info['symptom_details'].get('progression'),
+    "additional_symptoms": lambda info: info['additional_symptoms'],
+}
+
+
+def get_clinical_fingerprint(patient_info: Dict[str, Any]) -> Dict[str, str]:
+    """
+    증상 분석에 영향을 주는 항목별 해시
+    
+    이름, 대화 기록처럼 분석 결과와 무관한 항목이 바뀌어도 값이 같으므로
+    이전 분석을 재사용할지 판단하는 데 사용합니다.
+    
+    Returns:
+        {항목 이름: 값의 해시} 딕셔너리
+    """
+    return {
+        field: hashlib.sha1(
+            json.dumps(getter(patient_info), ensure_ascii=False, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+        for field, getter in CLINICAL_FIELDS.items()
+    }
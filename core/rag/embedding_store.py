@@ -0,0 +1,162 @@
+"""
+청크 임베딩 저장소 및 벡터 검색 모듈
+"""
+
+import json
+import os
+import zlib
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from core.rag.retriever import tokenize, expand_query
+
+
+class HashingEmbedder:
+    """
+    해싱 트릭 기반 로컬 임베딩 함수
+
+    API 호출 없이 동작하므로 오프라인 실행과 테스트에 사용합니다.
+    """
+
+    def __init__(self, dim: int = 512):
+        """
+        Args:
+            dim: 임베딩 차원
+        """
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        """텍스트 리스트를 (len(texts), dim) float32 행렬로 변환"""
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in tokenize(expand_query(text)):
+                bucket = zlib.crc32(token.encode('utf-8'))
+                sign = 1.0 if bucket & 0x80000000 else -1.0
+                vectors[row, bucket % self.dim] += sign
+        return vectors
+
+
+class OpenAIEmbedder:
+    """OpenAI 임베딩 API 기반 임베딩 함수 (배치 요청)"""
+
+    def __init__(self, client, model: str, batch_size: int = 100):
+        """
+        Args:
+            client: OpenAI 클라이언트
+            model: 임베딩 모델 이름
+            batch_size: 요청 1회에 보낼 텍스트 수
+        """
+        self.client = client
+        self.model = model
+        self.batch_size = batch_size
+        self.name = model
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        """텍스트 리스트를 (len(texts), dim) float32 행렬로 변환"""
+        rows = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = [text or " " for text in texts[start:start + self.batch_size]]
+            response = self.client.embeddings.create(model=self.model, input=batch)
+            data = sorted(response.data, key=lambda item: item.index)
+            rows.extend(item.embedding for item in data)
+        return np.asarray(rows, dtype=np.float32)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """행 단위 L2 정규화 (영벡터는 그대로 유지)"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+class EmbeddingStore:
+    """
+    청크 임베딩 행렬 저장소
+
+    정규화된 float32 행렬을 .npy로 저장하고 메모리 맵으로 읽어
+    여러 프로세스가 복사 없이 같은 벡터를 공유할 수 있습니다.
+    """
+
+    def __init__(self, chunks: List[Dict[str, Any]], embedder, vectors: np.ndarray):
+        self.chunks = chunks
+        self.embedder = embedder
+        self.vectors = vectors
+
+    @classmethod
+    def load_or_build(
+        cls,
+        chunks: List[Dict[str, Any]],
+        embedder,
+        cache_dir: Optional[str] = None,
+        corpus_key: Optional[str] = None
+    ) -> "EmbeddingStore":
+        """
+        저장된 임베딩을 불러오거나 새로 계산하여 저장
+
+        Args:
+            chunks: 청크 리스트
+            embedder: 텍스트 리스트 → 행렬 임베딩 함수 (name 속성 필요)
+            cache_dir: 임베딩 저장 디렉토리 (None이면 메모리에만 보관)
+            corpus_key: 코퍼스와 청크 설정을 식별하는 키 (None이면 저장 안 함)
+
+        Returns:
+            EmbeddingStore
+        """
+        if not cache_dir or not corpus_key:
+            vectors = _normalize(embedder([chunk['text'] for chunk in chunks]))
+            return cls(chunks, embedder, vectors)
+
+        cache_dir = Path(cache_dir)
+        safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in embedder.name)
+        stem = f"embeddings-{corpus_key}-{safe_name}"
+        vectors_path = cache_dir / f"{stem}.npy"
+        meta_path = cache_dir / f"{stem}.json"
+
+        metadata = {
+            'embedder': embedder.name,
+            'corpus_key': corpus_key,
+            'num_chunks': len(chunks)
+        }
+        if vectors_path.exists() and meta_path.exists():
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    stored = json.load(f)
+                if stored == metadata:
+                    vectors = np.load(vectors_path, mmap_mode='r')
+                    return cls(chunks, embedder, vectors)
+            except (OSError, ValueError):
+                pass
+
+        vectors = _normalize(embedder([chunk['text'] for chunk in chunks]))
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_dir / f"{stem}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, vectors)
+        os.replace(tmp_path, vectors_path)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False)
+        os.replace(tmp_path, meta_path)
+        return cls(chunks, embedder, np.load(vectors_path, mmap_mode='r'))
+
+    def search(self, query_text: str, k: int) -> List[Dict[str, Any]]:
+        """
+        코사인 유사도 상위 k개 청크 반환
+
+        Args:
+            query_text: 질문 텍스트
+            k: 반환할 청크 수
+
+        Returns:
+            유사도 순으로 정렬된 청크 리스트
+        """
+        if len(self.chunks) == 0:
+            return []
+        query_vector = _normalize(self.embedder([query_text]))[0]
+        scores = self.vectors @ query_vector
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [self.chunks[i] for i in top if scores[i] > 0]
@@ -0,0 +1,108 @@
+"""
+PDF 추출 텍스트 디스크 캐시 모듈
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+
+# 캐시 형식이 바뀌면 값을 올려 기존 캐시를 무효화
+CACHE_FORMAT_VERSION = 1
+
+# 파일 크기/수정 시각 → 해시 매핑 (매번 전체 파일을 해싱하지 않기 위함)
+STAT_INDEX_FILENAME = "stat_index.json"
+
+
+def _hash_file(path: Path) -> str:
+    """파일 내용의 SHA-256 해시 계산"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PageCache:
+    """PDF 내용 해시를 키로 추출된 페이지와 청크를 저장하는 캐시"""
+
+    def __init__(self, cache_dir: str):
+        """
+        캐시 초기화
+
+        Args:
+            cache_dir: 캐시 파일을 저장할 디렉토리
+        """
+        self.cache_dir = Path(cache_dir)
+
+    def fingerprint(self, pdf_path: str) -> str:
+        """
+        PDF 내용 해시 반환
+
+        크기와 수정 시각이 이전과 같으면 저장된 해시를 재사용하고,
+        달라졌으면 파일을 다시 해싱합니다.
+        """
+        path = Path(pdf_path).resolve()
+        stat = path.stat()
+        stat_key = f"{stat.st_size}:{stat.st_mtime_ns}"
+
+        index = self._read_json(self.cache_dir / STAT_INDEX_FILENAME) or {}
+        entry = index.get(str(path))
+        if entry and entry.get('stat') == stat_key:
+            return entry['sha256']
+
+        sha256 = _hash_file(path)
+        index[str(path)] = {'stat': stat_key, 'sha256': sha256}
+        self._write_json(self.cache_dir / STAT_INDEX_FILENAME, index)
+        return sha256
+
+    def load(self, sha256: str) -> Optional[Dict[str, Any]]:
+        """캐시된 추출 결과 반환 (없거나 형식이 다르면 None)"""
+        path = self._entry_path(sha256)
+        if not path.exists():
+            return None
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('version') != CACHE_FORMAT_VERSION or entry.get('sha256') != sha256:
+            return None
+        return entry
+
+    def save(self, sha256: str, entry: Dict[str, Any]):
+        """
+        추출 결과 저장
+
+        Args:
+            sha256: PDF 내용 해시
+            entry: 'pages', 'chunks', 'chunk_params' 등을 담은 딕셔너리
+        """
+        entry = dict(entry, version=CACHE_FORMAT_VERSION, sha256=sha256)
+        path = self._entry_path(sha256)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=1) as f:
+            json.dump(entry, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def _entry_path(self, sha256: str) -> Path:
+        return self.cache_dir / f"pages-{sha256[:32]}.json.gz"
+
+    @staticmethod
+    def _read_json(path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_json(self, path: Path, data: Dict[str, Any]):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
@@ -3,49 +3,233 @@ RAG (Retrieval-Augmented Generation) 시스템 모듈
 노트북 버전과 동일하게 langchain_community 없이 구현
 """
 
-from openai import OpenAI
-import pypdf
-import sys
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-# 프로젝트 루트를 sys.path에 추가
-PROJECT_ROOT = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(PROJECT_ROOT))
+from config.config import (
+    GPT_MODEL,
+    EMBEDDING_MODEL,
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    RETRIEVER_K,
+    RETRIEVAL_MODE,
+    HYBRID_CANDIDATES,
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_SIZE,
+    HASHING_EMBEDDING_DIM,
+    CACHE_DIR,
+    RESPONSE_CACHE_ENABLED,
+    RESPONSE_CACHE_SIZE,
+    RESPONSE_CACHE_TTL,
+    RESPONSE_CACHE_PERSIST,
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_SIZE,
+    SEMANTIC_CACHE_TTL,
+    PDF_EXTRACT_WORKERS,
+    PDF_EXTRACT_BATCH_PAGES
+)
+from core.llm.client import get_openai_client
+from core.telemetry.metrics import span, record_cache_hit
+from core.rag.page_cache import PageCache
+from core.rag.response_cache import ResponseCache
+from core.rag.retriever import (
+    BM25Retriever,
+    reciprocal_rank_fusion,
+    split_pages_into_chunks
+)
 
-from config.config import OPENAI_API_KEY, GPT_MODEL
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> list:
+    """
+    PDF의 [start, end) 페이지 텍스트 추출 (워커 프로세스에서 실행)
+    
+    Returns:
+        list: {'page_number', 'text'} 페이지 리스트
+    """
+    import pypdf
+
+    with open(pdf_path, 'rb') as file:
+        return _read_pages(pypdf.PdfReader(file), start, end)
+
+
+def _read_pages(pdf_reader, start: int, end: int) -> list:
+    """열린 PdfReader에서 [start, end) 페이지 텍스트 추출"""
+    return [
+        {'page_number': page_num, 'text': pdf_reader.pages[page_num].extract_text()}
+        for page_num in range(start, end)
+    ]
 
 
 class RAGSystem:
-    """RAG 시스템 클래스 (노트북과 동일한 방식)"""
+    """
+    RAG 시스템 클래스 (노트북과 동일한 방식)
     
-    def __init__(self, pdf_path: str):
+    load_and_build() 이후에는 읽기 전용이므로 여러 세션(스레드)이
+    하나의 인스턴스를 공유할 수 있습니다. get_shared_rag_system() 참고.
+    """
+    
+    def __init__(
+        self,
+        pdf_path: str,
+        cache_dir: str = CACHE_DIR,
+        extract_workers: int = PDF_EXTRACT_WORKERS,
+        retrieval_mode: str = RETRIEVAL_MODE,
+        embedder=None,
+        client=None
+    ):
         """
         RAG 시스템 초기화
         
         Args:
             pdf_path: PDF 파일 경로
+            cache_dir: 추출 텍스트/임베딩 캐시 디렉토리 (None이면 캐시 사용 안 함)
+            extract_workers: PDF 페이지 추출 프로세스 수 (1: 순차, 0: CPU 코어 수)
+            retrieval_mode: 검색 방식 ("keyword", "dense" 또는 "hybrid")
+            embedder: dense 검색/의미 기반 캐시용 임베딩 함수 (None이면 필요할 때만
+                EMBEDDING_BACKEND 설정으로 생성, keyword 검색만 쓰면 생성하지 않음)
+            client: OpenAI 호환 클라이언트 (None이면 프로세스 공유 클라이언트)
         """
+        if retrieval_mode not in ("keyword", "dense", "hybrid"):
+            raise ValueError(f"지원하지 않는 검색 방식입니다: {retrieval_mode}")
+        
         self.pdf_path = pdf_path
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
+        self.extract_workers = extract_workers or os.cpu_count() or 1
+        self.retrieval_mode = retrieval_mode
+        self.client = client or get_openai_client()
+        self.embedder = embedder
+        if self.embedder is None and (retrieval_mode != "keyword" or SEMANTIC_CACHE_ENABLED):
+            self.embedder = self._default_embedder()
+        self.cache_dir = cache_dir
+        self.page_cache = PageCache(cache_dir) if cache_dir else None
+        self.response_cache = None
+        if RESPONSE_CACHE_ENABLED:
+            db_path = None
+            if RESPONSE_CACHE_PERSIST and cache_dir:
+                db_path = Path(cache_dir) / "responses.sqlite3"
+            self.response_cache = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL, db_path)
+        self.semantic_cache = None
+        if SEMANTIC_CACHE_ENABLED:
+            from core.rag.semantic_cache import SemanticCache
+
+            self.semantic_cache = SemanticCache(
+                self.embedder, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_SIZE, SEMANTIC_CACHE_TTL
+            )
+        self.corpus_version = None
         self.pdf_text = ""
         self.pages = []
+        self.chunks = []
+        self.retriever = None
+        self.embedding_store = None
         
     def load_and_build(self):
-        """PDF 로드 및 텍스트 추출"""
-        # PDF 읽기
+        """PDF 로드, 텍스트 추출 및 검색 인덱스 구축"""
+        with span("pdf_load", pdf=Path(self.pdf_path).name) as current:
+            chunk_params = [CHUNK_SIZE, CHUNK_OVERLAP]
+            cached = None
+            if self.page_cache:
+                self.corpus_version = self.page_cache.fingerprint(self.pdf_path)
+                cached = self.page_cache.load(self.corpus_version)
+        
+            if cached:
+                record_cache_hit("page")
+                pages = cached['pages']
+            else:
+                pages = self._extract_pages()
+        
+            # 청크 분할 (청크 설정이 같으면 캐시된 청크 재사용)
+            if cached and cached.get('chunk_params') == chunk_params:
+                chunks = cached['chunks']
+            else:
+                chunks = split_pages_into_chunks(pages, CHUNK_SIZE, CHUNK_OVERLAP)
+                if self.page_cache:
+                    self.page_cache.save(self.corpus_version, {
+                        'pages': pages,
+                        'chunks': chunks,
+                        'chunk_params': chunk_params
+                    })
+        
+            # 공유 시 변경되지 않도록 튜플로 고정
+            self.pages = tuple(pages)
+            self.chunks = tuple(chunks)
+            self.pdf_text = "".join(page['text'] + "\n\n" for page in self.pages)
+        
+            # 검색기 구축
+            self.retriever = BM25Retriever(self.chunks)
+            if self.retrieval_mode in ("dense", "hybrid"):
+                from core.rag.embedding_store import EmbeddingStore
+
+                corpus_key = None
+                if self.corpus_version:
+                    corpus_key = f"{self.corpus_version[:16]}-{CHUNK_SIZE}-{CHUNK_OVERLAP}"
+                self.embedding_store = EmbeddingStore.load_or_build(
+                    self.chunks, self.embedder, self.cache_dir, corpus_key
+                )
+        
+            current.set(pages=len(self.pages), chunks=len(self.chunks))
+            return len(self.pages)
+    
+    def _default_embedder(self):
+        """EMBEDDING_BACKEND 설정에 따른 임베딩 함수 생성 (numpy는 이때 불러옴)"""
+        from core.rag.embedding_store import HashingEmbedder, OpenAIEmbedder
+
+        if EMBEDDING_BACKEND == "hashing":
+            return HashingEmbedder(HASHING_EMBEDDING_DIM)
+        return OpenAIEmbedder(self.client, EMBEDDING_MODEL, EMBEDDING_BATCH_SIZE)
+    
+    def _extract_pages(self) -> list:
+        """PDF에서 페이지별 텍스트 추출 (extract_workers > 1이면 병렬)"""
+        import pypdf
+
         with open(self.pdf_path, 'rb') as file:
             pdf_reader = pypdf.PdfReader(file)
+            num_pages = len(pdf_reader.pages)
+            # 순차 추출이면 페이지 수를 세려고 연 문서를 그대로 사용
+            if self.extract_workers <= 1 or num_pages <= PDF_EXTRACT_BATCH_PAGES:
+                return _read_pages(pdf_reader, 0, num_pages)
+        
+        # 페이지 구간별로 워커 프로세스에 분배하고 페이지 순서대로 다시 합침
+        ranges = [
+            (start, min(start + PDF_EXTRACT_BATCH_PAGES, num_pages))
+            for start in range(0, num_pages, PDF_EXTRACT_BATCH_PAGES)
+        ]
+        max_workers = min(self.extract_workers, len(ranges))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                _extract_page_range,
+                [self.pdf_path] * len(ranges),
+                [start for start, _ in ranges],
+                [end for _, end in ranges]
+            )
+            return [page for batch in results for page in batch]
+    
+    def retrieve(self, query_text: str, k: int = RETRIEVER_K) -> list:
+        """
+        질의와 관련된 상위 k개 청크 검색
+        
+        Args:
+            query_text: 질문 텍스트
+            k: 반환할 청크 수
             
-            # 모든 페이지 텍스트 추출
-            for page_num, page in enumerate(pdf_reader.pages):
-                page_text = page.extract_text()
-                self.pages.append({
-                    'page_number': page_num,
-                    'text': page_text
-                })
-                self.pdf_text += page_text + "\n\n"
-        
-        return len(self.pages)
+        Returns:
+            list: {'chunk_id', 'page_number', 'text'} 청크 리스트
+        """
+        if self.retrieval_mode == "hybrid":
+            candidates = max(k, HYBRID_CANDIDATES)
+            chunks = reciprocal_rank_fusion([
+                self.retriever.search(query_text, candidates),
+                self.embedding_store.search(query_text, candidates)
+            ], k)
+        elif self.retrieval_mode == "dense":
+            chunks = self.embedding_store.search(query_text, k)
+        else:
+            chunks = self.retriever.search(query_text, k)
+        if not chunks:
+            # 일치하는 키워드가 없으면 문서 앞부분(개요)을 사용
+            chunks = self.chunks[:k]
+        return list(chunks)
     
     def query(self, query_text: str) -> dict:
         """
@@ -57,14 +241,30 @@ class RAGSystem:
         Returns:
             dict: 답변, 입력, 컨텍스트 포함
         """
-        if not self.pdf_text:
-            raise ValueError("RAG 시스템이 초기화되지 않았습니다. load_and_build()를 먼저 실행하세요.")
+        with span("rag.query"):
+            if not self.pdf_text:
+                raise ValueError("RAG 시스템이 초기화되지 않았습니다. load_and_build()를 먼저 실행하세요.")
+        
+            temperature = 0.3
+            cache_key = None
+            if self.response_cache is not None:
+                # 검색 설정이 바뀌면 컨텍스트가 달라지므로 코퍼스 버전에 포함
+                corpus_version = f"{self.corpus_version}:{self.retrieval_mode}:{RETRIEVER_K}"
+                cache_key = self.response_cache.make_key(query_text, GPT_MODEL, temperature, corpus_version)
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    record_cache_hit("response")
+                    return cached
         
-        # 1. 컨텍스트로 전체 PDF 텍스트 사용 (간단한 구현)
-        context = self.pdf_text
+            # 1. 질의와 관련된 상위 청크만 컨텍스트로 사용
+            retrieved_chunks = self.retrieve(query_text)
+            context = "\n\n".join(
+                f"[페이지 {chunk['page_number']}]\n{chunk['text']}"
+                for chunk in retrieved_chunks
+            )
         
-        # 2. 프롬프트 생성
-        system_prompt = f"""당신은 청각 장애(hearing loss) 전문 의료 지식 어시스턴트입니다. 
+            # 2. 프롬프트 생성
+            system_prompt = f"""당신은 청각 장애(hearing loss) 전문 의료 지식 어시스턴트입니다. 
 제공된 의학 문헌을 바탕으로 정확하고 전문적인 답변을 제공하세요. 
 답변은 명확하고 이해하기 쉽게 작성하되, 의학 용어가 필요한 경우 설명을 덧붙이세요.
 
@@ -72,29 +272,48 @@ class RAGSystem:
 {context}
 """
         
-        # 3. LLM 호출
-        response = self.client.chat.completions.create(
-            model=GPT_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": query_text}
-            ],
-            temperature=0.3
-        )
-        
-        answer = response.choices[0].message.content
-        
-        # 4. 결과 반환
-        return {
-            "input": query_text,
-            "answer": answer,
-            "context": self.pages  # 페이지 정보 반환
-        }
+            # 3. LLM 호출
+            response = self.client.chat.completions.create(
+                model=GPT_MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": query_text}
+                ],
+                temperature=temperature
+            )
+        
+            answer = response.choices[0].message.content
+        
+            # 4. 결과 반환
+            result = {
+                "input": query_text,
+                "answer": answer,
+                "context": retrieved_chunks  # 검색된 청크 (페이지 정보 포함) 반환
+            }
+            if cache_key is not None:
+                self.response_cache.set(cache_key, result)
+            return result
     
     def get_symptoms_analysis(self, symptom_description: str) -> dict:
-        """증상 분석 (RAG 쿼리)"""
+        """증상 분석 (RAG 쿼리, 의미 기반 캐시 사용 시 유사한 이전 분석 재사용)"""
+        normalized = None
+        vector = None
+        if self.semantic_cache is not None:
+            from core.rag.semantic_cache import normalize_symptom_summary
+
+            normalized = normalize_symptom_summary(symptom_description)
+            vector = self.semantic_cache.embed(normalized)
+            cached = self.semantic_cache.lookup(normalized, self.corpus_version, vector)
+            if cached is not None:
+                record_cache_hit("semantic")
+                return cached
+        
         query = f"다음 증상과 관련된 청각 장애 유형, 원인, 그리고 관련 질환을 알려주세요: {symptom_description}"
-        return self.query(query)
+        result = self.query(query)
+        
+        if self.semantic_cache is not None:
+            self.semantic_cache.add(normalized, result, self.corpus_version, vector)
+        return result
     
     def get_disease_info(self, disease_name: str) -> dict:
         """질병 정보 조회"""
@@ -107,3 +326,31 @@ class RAGSystem:
         query = f"다음 질환들을 감별하기 위해 환자에게 물어봐야 할 중요한 질문들을 알려주세요: {diseases_str}"
         return self.query(query)
 
+
+# 프로세스 전체에서 공유하는 RAG 시스템 (PDF 경로별 1개)
+_shared_rag_systems = {}
+_shared_rag_lock = threading.Lock()
+
+
+def get_shared_rag_system(pdf_path: str) -> RAGSystem:
+    """
+    프로세스 전체에서 공유하는 RAG 시스템 반환
+    
+    최초 호출 시 한 번만 PDF를 로드하고 인덱스를 구축하며, 이후에는
+    모든 세션이 같은 읽기 전용 인스턴스를 사용합니다.
+    대화 상태는 세션별 MedicalConsultation에만 보관하세요.
+    
+    Args:
+        pdf_path: PDF 파일 경로
+        
+    Returns:
+        RAGSystem: 구축이 끝난 공유 인스턴스
+    """
+    key = str(Path(pdf_path).resolve())
+    with _shared_rag_lock:
+        rag = _shared_rag_systems.get(key)
+        if rag is None:
+            rag = RAGSystem(pdf_path)
+            rag.load_and_build()
+            _shared_rag_systems[key] = rag
+    return rag
@@ -0,0 +1,135 @@
+"""
+RAG 응답 캐시 모듈 (LRU + TTL, 선택적 디스크 저장)
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+
+def normalize_query(query_text: str) -> str:
+    """캐시 키용 질의 정규화 (유니코드 NFC, 공백 정리, 소문자)"""
+    return " ".join(unicodedata.normalize('NFC', query_text).split()).lower()
+
+
+class ResponseCache:
+    """
+    크기 기반 LRU 제거와 TTL 만료를 지원하는 응답 캐시
+
+    db_path를 지정하면 SQLite 파일에도 저장하여 재시작 후에도 유지됩니다.
+    여러 세션(스레드)에서 동시에 사용할 수 있습니다.
+    """
+
+    def __init__(self, max_size: int = 256, ttl_seconds: float = 86400, db_path: Optional[str] = None):
+        """
+        캐시 초기화
+
+        Args:
+            max_size: 메모리(및 디스크)에 보관할 최대 항목 수
+            ttl_seconds: 항목 유효 시간 (초)
+            db_path: 디스크 저장용 SQLite 파일 경로 (None이면 메모리만 사용)
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key → (만료 시각, 값)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._db = None
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, expires_at REAL, value TEXT)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(query_text: str, model: str, temperature: float, corpus_version: str) -> str:
+        """질의, 모델, temperature, 코퍼스 버전으로 캐시 키 생성"""
+        raw = json.dumps(
+            [normalize_query(query_text), model, temperature, corpus_version],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """캐시된 값 반환 (없거나 만료되었으면 None)"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT expires_at, value FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row and row[0] > now:
+                    value = json.loads(row[1])
+                    self._store(key, row[0], value)
+                    self.hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """값 저장 (JSON 직렬화 가능한 딕셔너리)"""
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._store(key, expires_at, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, expires_at, value) VALUES (?, ?, ?)",
+                    (key, expires_at, json.dumps(value, ensure_ascii=False))
+                )
+                # 만료 항목 정리 및 최대 크기 유지
+                self._db.execute(
+                    "DELETE FROM responses WHERE expires_at <= ? OR key NOT IN ("
+                    "SELECT key FROM responses ORDER BY expires_at DESC LIMIT ?)",
+                    (time.time(), self.max_size)
+                )
+                self._db.commit()
+
+    def clear(self):
+        """모든 항목 삭제"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """적중/실패/제거 횟수와 현재 크기 반환"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "hit_rate": self.hits / total if total else 0.0
+            }
+
+    def _store(self, key: str, expires_at: float, value: Dict[str, Any]):
+        """메모리에 저장하고 최대 크기를 넘으면 가장 오래 사용하지 않은 항목 제거 (락 보유 상태에서 호출)"""
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
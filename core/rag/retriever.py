@@ -0,0 +1,219 @@
+"""
+문서 청크 분할 및 키워드(BM25) 기반 검색 모듈
+"""
+
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, Any, List
+
+
+# 영문/숫자/한글 단어 단위 토큰
+TOKEN_PATTERN = re.compile(r"[0-9a-z가-힣]+")
+
+# 검색 점수에 의미 없는 영어 불용어
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the
+this to was were with which may can not but also than other these those
+""".split())
+
+# 한국어 질의를 영어 의학 문헌과 매칭하기 위한 용어 확장
+QUERY_TERM_EXPANSIONS = {
+    "난청": "hearing loss deafness",
+    "청력": "hearing",
+    "청각": "hearing auditory",
+    "돌발성": "sudden",
+    "갑작스": "sudden acute",
+    "점진적": "progressive gradual",
+    "이명": "tinnitus",
+    "어지러": "vertigo dizziness",
+    "현기증": "vertigo dizziness",
+    "이통": "otalgia ear pain",
+    "귀 통증": "otalgia ear pain",
+    "이충만감": "aural fullness",
+    "먹먹": "aural fullness",
+    "이루": "otorrhea discharge",
+    "고름": "otorrhea discharge",
+    "중이염": "otitis media effusion",
+    "메니에르": "meniere endolymphatic hydrops",
+    "이경화증": "otosclerosis",
+    "청신경종": "acoustic neuroma vestibular schwannoma",
+    "진주종": "cholesteatoma",
+    "고막": "tympanic membrane",
+    "소음": "noise exposure",
+    "노인성": "presbycusis age",
+    "선천성": "congenital",
+    "유전": "genetic hereditary",
+    "가족력": "family history genetic",
+    "약물": "ototoxic drug medication",
+    "이독성": "ototoxic",
+    "감염": "infection",
+    "외상": "trauma",
+    "편측": "unilateral",
+    "한쪽": "unilateral",
+    "양측": "bilateral",
+    "양쪽": "bilateral",
+    "전음성": "conductive",
+    "감각신경성": "sensorineural",
+    "신생아": "newborn infant screening",
+    "아이": "child children",
+    "소아": "child children pediatric",
+    "검사": "test evaluation audiometry",
+    "치료": "treatment management",
+    "원인": "cause etiology",
+    "진단": "diagnosis",
+    "보청기": "hearing aid amplification",
+    "인공와우": "cochlear implant",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """검색용 토큰 분리 (소문자, 불용어 제거)"""
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if token not in STOPWORDS and len(token) > 1
+    ]
+
+
+def expand_query(query_text: str) -> str:
+    """한국어 의학 용어를 영어 동의어로 확장한 질의 반환"""
+    expansions = [
+        english for korean, english in QUERY_TERM_EXPANSIONS.items()
+        if korean in query_text
+    ]
+    if not expansions:
+        return query_text
+    return query_text + " " + " ".join(expansions)
+
+
+def split_pages_into_chunks(
+    pages: List[Dict[str, Any]],
+    chunk_size: int,
+    chunk_overlap: int
+) -> List[Dict[str, Any]]:
+    """
+    페이지 텍스트를 겹치는 청크로 분할
+
+    Args:
+        pages: {'page_number', 'text'} 페이지 리스트
+        chunk_size: 청크 최대 길이 (문자 수)
+        chunk_overlap: 인접 청크 간 겹치는 길이 (문자 수)
+
+    Returns:
+        {'chunk_id', 'page_number', 'text'} 청크 리스트
+    """
+    if chunk_overlap >= chunk_size:
+        raise ValueError("CHUNK_OVERLAP은 CHUNK_SIZE보다 작아야 합니다.")
+
+    chunks = []
+    for page in pages:
+        text = " ".join(page['text'].split())
+        start = 0
+        while start < len(text):
+            end = min(start + chunk_size, len(text))
+            # 단어 중간에서 잘리지 않도록 마지막 공백에서 자르기
+            if end < len(text):
+                space = text.rfind(" ", start + chunk_overlap + 1, end)
+                if space != -1:
+                    end = space
+            chunks.append({
+                'chunk_id': len(chunks),
+                'page_number': page['page_number'],
+                'text': text[start:end]
+            })
+            if end >= len(text):
+                break
+            start = max(end - chunk_overlap, start + 1)
+    return chunks
+
+
+class BM25Retriever:
+    """
+    역색인(inverted index) 기반 BM25 청크 검색기
+
+    질의에 포함된 용어의 posting 리스트만 순회하므로
+    API 호출 없이 빠르게 검색할 수 있습니다.
+    """
+
+    def __init__(self, chunks: List[Dict[str, Any]], k1: float = 1.5, b: float = 0.75):
+        """
+        검색기 초기화
+
+        Args:
+            chunks: split_pages_into_chunks()로 만든 청크 리스트
+            k1: 용어 빈도 포화 파라미터
+            b: 문서 길이 정규화 파라미터
+        """
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+
+        # 용어 → [(청크 인덱스, 용어 빈도), ...]
+        self.postings = {}
+        self.doc_lengths = []
+        for index, chunk in enumerate(chunks):
+            counts = Counter(tokenize(chunk['text']))
+            self.doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings.setdefault(term, []).append((index, tf))
+
+        num_chunks = len(chunks)
+        self.avg_doc_length = (sum(self.doc_lengths) / num_chunks) if num_chunks else 0.0
+        self.idf = {
+            term: math.log(1 + (num_chunks - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    def search(self, query_text: str, k: int) -> List[Dict[str, Any]]:
+        """
+        질의와 가장 관련 있는 청크 k개 반환
+
+        Args:
+            query_text: 질문 텍스트
+            k: 반환할 청크 수
+
+        Returns:
+            BM25 점수 순으로 정렬된 청크 리스트 (일치하는 용어가 없는 청크 제외)
+        """
+        scores = {}
+        for term in set(tokenize(expand_query(query_text))):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf[term]
+            for index, tf in postings:
+                length_norm = 1 - self.b + self.b * self.doc_lengths[index] / self.avg_doc_length
+                score = idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+                scores[index] = scores.get(index, 0.0) + score
+
+        top = heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [self.chunks[index] for index, _ in top]
+
+
+def reciprocal_rank_fusion(
+    result_lists: List[List[Dict[str, Any]]],
+    k: int,
+    rrf_k: int = 60
+) -> List[Dict[str, Any]]:
+    """
+    여러 검색 결과를 Reciprocal Rank Fusion으로 결합
+
+    Args:
+        result_lists: 검색기별 순위 리스트
+        k: 반환할 청크 수
+        rrf_k: 순위 완화 상수 (클수록 하위 순위의 영향이 커짐)
+
+    Returns:
+        결합 점수 순으로 정렬된 청크 리스트
+    """
+    scores = {}
+    chunks_by_id = {}
+    for results in result_lists:
+        for rank, chunk in enumerate(results, 1):
+            chunk_id = chunk['chunk_id']
+            chunks_by_id[chunk_id] = chunk
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (rrf_k + rank)
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return [chunks_by_id[chunk_id] for chunk_id, _ in ranked[:k]]
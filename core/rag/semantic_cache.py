@@ -0,0 +1,210 @@
+"""
+의미 기반 유사 질의 캐시 모듈 (증상 분석용)
+"""
+
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from core.rag.response_cache import normalize_query
+
+
+# 정보가 없는 항목 ("- 발생 시기: None" 등)은 유사도 계산에서 제외
+_EMPTY_FIELD_PATTERN = re.compile(r"^-\s*[^:]+:\s*(n/a|none)?\s*(세)?\s*$")
+_FIELD_PATTERN = re.compile(r"^-\s*([^:]+):\s*(.*)$")
+# 정확히 같아야 재사용하는 항목 (부위, 나이대, 증상 집합이 다르면 임상적으로 다른 환자)
+_SYMPTOM_SET_FIELDS = ("주 증상", "증상 목록", "추가 증상")
+
+
+def normalize_symptom_summary(summary: str) -> str:
+    """get_symptoms_summary() 결과에서 빈 항목을 제거하고 정규화"""
+    lines = []
+    for line in summary.splitlines():
+        line = normalize_query(line)
+        if line and line != "환자 정보:" and not _EMPTY_FIELD_PATTERN.match(line):
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def split_symptom_summary(normalized: str) -> Tuple[str, str]:
+    """
+    정규화된 증상 요약을 (임상 키, 나머지 텍스트)로 분리
+
+    임상 키는 영향 부위, 나이대(10년 단위), 증상 집합(주 증상/증상 목록/추가 증상)이고,
+    나머지는 발생 시기, 진행 양상처럼 표현만 달라도 같은 의미일 수 있는 항목입니다.
+    """
+    side = None
+    age_band = None
+    symptoms = set()
+    remainder = []
+    for line in normalized.splitlines():
+        match = _FIELD_PATTERN.match(line)
+        if match is None:
+            remainder.append(line)
+            continue
+        field, value = match.group(1).strip(), match.group(2).strip()
+        if field == "영향 부위":
+            side = value
+        elif field == "나이":
+            age = re.match(r"\d+", value)
+            age_band = f"{int(age.group(0)) // 10 * 10}대" if age else value
+        elif field in _SYMPTOM_SET_FIELDS:
+            symptoms.update(item.strip() for item in value.split(",") if item.strip())
+        else:
+            remainder.append(line)
+    clinical_key = json.dumps(
+        {"side": side, "age_band": age_band, "symptoms": sorted(symptoms)},
+        ensure_ascii=False,
+        sort_keys=True
+    )
+    return clinical_key, "\n".join(remainder)
+
+
+class SemanticCache:
+    """
+    임베딩 유사도 기반 캐시
+
+    임상 키(split_symptom_summary)가 정확히 같은 이전 질의 중에서 나머지 텍스트의
+    코사인 유사도가 threshold 이상이면 저장된 답변을 재사용합니다
+    (나머지 텍스트가 같거나 둘 다 비어 있으면 유사도 1). 항목마다 원본 질의, 생성 시각, 코퍼스 버전,
+    재사용 횟수(provenance)를 기록하며 LRU와 TTL로 제거합니다.
+    """
+
+    def __init__(self, embedder, threshold: float = 0.95, max_size: int = 256, ttl_seconds: float = 86400):
+        """
+        캐시 초기화
+
+        Args:
+            embedder: 텍스트 리스트 → 행렬 임베딩 함수
+            threshold: 재사용할 최소 코사인 유사도
+            max_size: 최대 항목 수
+            ttl_seconds: 항목 유효 시간 (초)
+        """
+        self.embedder = embedder
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # 항목 ID → 항목 딕셔너리
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def embed(self, query_text: str) -> Optional[np.ndarray]:
+        """
+        질의의 나머지 텍스트 임베딩 (정규화된 벡터, 나머지가 비어 있으면 None)
+
+        lookup()과 add()에 넘기면 실패한 질의를 한 번만 임베딩합니다.
+        """
+        _, remainder = split_symptom_summary(query_text)
+        if not remainder:
+            return None
+        vector = np.asarray(self.embedder([remainder])[0], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, query_text: str, corpus_version: str = None, vector: np.ndarray = None) -> Optional[Dict[str, Any]]:
+        """
+        유사한 이전 질의의 답변 반환
+
+        Args:
+            query_text: 정규화된 질의 텍스트
+            corpus_version: 현재 코퍼스 버전 (다른 버전으로 만든 항목은 무시)
+            vector: embed(query_text) 결과 (없으면 여기서 계산)
+
+        Returns:
+            저장된 결과에 'semantic_cache' provenance를 추가한 딕셔너리 (없으면 None)
+        """
+        clinical_key, remainder = split_symptom_summary(query_text)
+        if vector is None and remainder:
+            vector = self.embed(query_text)
+        now = time.time()
+        with self._lock:
+            expired = [
+                entry_id for entry_id, entry in self._entries.items()
+                if entry['expires_at'] <= now or entry['corpus_version'] != corpus_version
+            ]
+            for entry_id in expired:
+                del self._entries[entry_id]
+                self.evictions += 1
+
+            candidates = [
+                entry_id for entry_id, entry in self._entries.items()
+                if entry['clinical_key'] == clinical_key
+            ]
+            best_id, similarity = self._best_match(candidates, remainder, vector)
+            if best_id is None or similarity < self.threshold:
+                self.misses += 1
+                return None
+
+            entry = self._entries[best_id]
+            self._entries.move_to_end(best_id)
+            entry['hit_count'] += 1
+            entry['last_hit_at'] = now
+            self.hits += 1
+            return dict(entry['result'], semantic_cache={
+                "similarity": similarity,
+                "source_query": entry['query_text'],
+                "created_at": entry['created_at'],
+                "hit_count": entry['hit_count'],
+                "corpus_version": entry['corpus_version']
+            })
+
+    def _best_match(self, candidates: list, remainder: str, vector: Optional[np.ndarray]) -> Tuple[Any, float]:
+        """임상 키가 같은 항목 중 나머지 텍스트가 가장 비슷한 항목 (호출자가 잠금 보유)"""
+        for entry_id in candidates:
+            if self._entries[entry_id]['remainder'] == remainder:
+                return entry_id, 1.0
+        candidates = [entry_id for entry_id in candidates if self._entries[entry_id]['vector'] is not None]
+        if not candidates or vector is None:
+            return None, 0.0
+        matrix = np.vstack([self._entries[entry_id]['vector'] for entry_id in candidates])
+        similarities = matrix @ vector
+        best = int(np.argmax(similarities))
+        return candidates[best], float(similarities[best])
+
+    def add(self, query_text: str, result: Dict[str, Any], corpus_version: str = None, vector: np.ndarray = None):
+        """
+        질의와 결과 저장 (최대 크기를 넘으면 가장 오래 사용하지 않은 항목 제거)
+
+        vector에 lookup()에 넘긴 embed() 결과를 주면 다시 임베딩하지 않습니다.
+        """
+        clinical_key, remainder = split_symptom_summary(query_text)
+        if vector is None and remainder:
+            vector = self.embed(query_text)
+        now = time.time()
+        with self._lock:
+            self._entries[self._next_id] = {
+                'clinical_key': clinical_key,
+                'remainder': remainder,
+                'vector': vector,
+                'query_text': query_text,
+                'result': result,
+                'corpus_version': corpus_version,
+                'created_at': now,
+                'expires_at': now + self.ttl_seconds,
+                'last_hit_at': None,
+                'hit_count': 0
+            }
+            self._next_id += 1
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """적중/실패/제거 횟수와 현재 크기 반환"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "hit_rate": self.hits / total if total else 0.0
+            }
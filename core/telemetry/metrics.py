@@ -0,0 +1,309 @@
+"""
+단계별 소요 시간/토큰 계측 모듈 (스팬, 훅, Prometheus/JSON 내보내기)
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Callable
+
+from config.config import METRICS_ENABLED
+
+
+# 스팬 소요 시간 히스토그램 경계 (초)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Prometheus 지표 이름 접두사
+METRIC_PREFIX = "medical_assistant"
+
+_current_span = contextvars.ContextVar("telemetry_span", default=None)
+
+
+class Span:
+    """
+    한 단계의 소요 시간과 속성
+
+    prompt_tokens, completion_tokens, llm_calls, cache_hits는 부모 스팬에도
+    합산되므로 턴 전체 스팬에서 하위 단계의 합계를 볼 수 있습니다.
+    """
+
+    _TOTALS = ("prompt_tokens", "completion_tokens", "llm_calls", "cache_hits")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, **attributes):
+        self.name = name
+        self.parent = parent
+        self.attributes = dict(attributes)
+        self.counts = {key: 0 for key in self._TOTALS}
+        self.error = None
+        self.start = time.perf_counter()
+        self.duration = None
+
+    def add(self, key: str, value: int = 1):
+        """집계 값 증가 (부모 스팬까지 전파)"""
+        span = self
+        while span is not None:
+            span.counts[key] = span.counts.get(key, 0) + value
+            span = span.parent
+
+    def set(self, **attributes):
+        """속성 지정"""
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "parent": self.parent.name if self.parent else None,
+            "duration_s": self.duration,
+            "error": self.error,
+            **self.counts,
+            "attributes": dict(self.attributes)
+        }
+
+
+class _Histogram:
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q: float) -> float:
+        """버킷 경계로 근사한 분위수 (마지막 버킷은 마지막 경계로 표시)"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return self.buckets[min(index, len(self.buckets) - 1)]
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    """완료된 스팬을 단계 이름별로 집계 (소요 시간 히스토그램, 토큰/캐시/오류 합계)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def __call__(self, span: Span):
+        """스팬 훅으로 등록되어 완료된 스팬을 집계"""
+        with self._lock:
+            stage = self._stages.get(span.name)
+            if stage is None:
+                stage = self._stages[span.name] = {
+                    "histogram": _Histogram(),
+                    "errors": 0,
+                    **{key: 0 for key in Span._TOTALS}
+                }
+            stage['histogram'].observe(span.duration)
+            if span.error:
+                stage['errors'] += 1
+            for key, value in span.counts.items():
+                stage[key] = stage.get(key, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+    def to_json(self) -> Dict[str, Any]:
+        """단계별 호출 수, 소요 시간 합/평균/근사 분위수, 토큰/캐시/오류 합계"""
+        with self._lock:
+            result = {}
+            for name, stage in sorted(self._stages.items()):
+                histogram = stage['histogram']
+                result[name] = {
+                    "count": histogram.count,
+                    "total_s": histogram.total,
+                    "mean_s": histogram.total / histogram.count if histogram.count else 0.0,
+                    "p50_s": histogram.quantile(0.5),
+                    "p95_s": histogram.quantile(0.95),
+                    "p99_s": histogram.quantile(0.99),
+                    "errors": stage['errors'],
+                    **{key: stage[key] for key in Span._TOTALS},
+                    "buckets": dict(zip(
+                        [str(bound) for bound in histogram.buckets] + ["+Inf"],
+                        histogram.counts
+                    ))
+                }
+            return result
+
+    def to_prometheus(self) -> str:
+        """Prometheus 텍스트 형식 (exposition format 0.0.4)"""
+        duration = f"{METRIC_PREFIX}_stage_duration_seconds"
+        lines = [
+            f"# HELP {duration} 단계별 소요 시간",
+            f"# TYPE {duration} histogram",
+        ]
+        counters = {
+            "tokens_total": "단계별 LLM 토큰 수",
+            "llm_calls_total": "단계별 LLM 호출 수",
+            "cache_hits_total": "단계별 캐시 적중 수",
+            "errors_total": "단계별 오류 수",
+        }
+        counter_lines = {name: [] for name in counters}
+
+        with self._lock:
+            for name, stage in sorted(self._stages.items()):
+                label = _escape_label(name)
+                histogram = stage['histogram']
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{duration}_bucket{{stage="{label}",le="{bound}"}} {cumulative}')
+                lines.append(f'{duration}_bucket{{stage="{label}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{duration}_sum{{stage="{label}"}} {histogram.total}')
+                lines.append(f'{duration}_count{{stage="{label}"}} {histogram.count}')
+
+                counter_lines['tokens_total'].append(
+                    f'{METRIC_PREFIX}_tokens_total{{stage="{label}",kind="prompt"}} {stage["prompt_tokens"]}'
+                )
+                counter_lines['tokens_total'].append(
+                    f'{METRIC_PREFIX}_tokens_total{{stage="{label}",kind="completion"}} {stage["completion_tokens"]}'
+                )
+                counter_lines['llm_calls_total'].append(
+                    f'{METRIC_PREFIX}_llm_calls_total{{stage="{label}"}} {stage["llm_calls"]}'
+                )
+                counter_lines['cache_hits_total'].append(
+                    f'{METRIC_PREFIX}_cache_hits_total{{stage="{label}"}} {stage["cache_hits"]}'
+                )
+                counter_lines['errors_total'].append(
+                    f'{METRIC_PREFIX}_errors_total{{stage="{label}"}} {stage["errors"]}'
+                )
+
+        for name, help_text in counters.items():
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} counter")
+            lines.extend(counter_lines[name])
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# 프로세스 공용 집계기와 스팬 훅
+registry = MetricsRegistry()
+_hooks = [registry]
+_hooks_lock = threading.Lock()
+
+
+def add_span_hook(hook: Callable[[Span], None]):
+    """완료된 스팬마다 호출할 함수 등록 (예: 외부 트레이싱 전송)"""
+    with _hooks_lock:
+        _hooks.append(hook)
+
+
+def remove_span_hook(hook: Callable[[Span], None]):
+    """등록한 훅 제거"""
+    with _hooks_lock:
+        if hook in _hooks:
+            _hooks.remove(hook)
+
+
+def current_span() -> Optional[Span]:
+    """현재 컨텍스트의 스팬 (없으면 None)"""
+    return _current_span.get()
+
+
+def start_span(name: str, **attributes) -> Span:
+    """
+    스팬 시작 (finish_span()으로 종료, 스트리밍처럼 블록으로 감쌀 수 없는 단계용)
+
+    현재 컨텍스트의 스팬을 부모로 하지만 현재 스팬을 바꾸지는 않습니다.
+    """
+    return Span(name, _current_span.get(), **attributes)
+
+
+def finish_span(span: Span, error: Optional[BaseException] = None):
+    """스팬 종료 및 훅 호출 (훅 오류는 무시)"""
+    if span.duration is not None:
+        return
+    span.duration = time.perf_counter() - span.start
+    if error is not None and span.error is None:
+        span.error = f"{type(error).__name__}: {error}"
+    if not METRICS_ENABLED:
+        return
+    with _hooks_lock:
+        hooks = list(_hooks)
+    for hook in hooks:
+        try:
+            hook(span)
+        except Exception as e:
+            print(f"[계측 훅 오류: {e}]")
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    블록의 소요 시간을 스팬으로 기록
+
+    Args:
+        name: 단계 이름 (예: "reply", "extraction")
+        **attributes: 스팬 속성
+
+    Yields:
+        Span (블록 안의 LLM 호출 토큰 수와 캐시 적중이 자동으로 기록됨)
+    """
+    current = start_span(name, **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        finish_span(current, e)
+        raise
+    finally:
+        _current_span.reset(token)
+        finish_span(current)
+
+
+@contextmanager
+def use_span(target: Span):
+    """이미 시작한 스팬을 블록 안에서 현재 스팬으로 사용 (종료하지 않음)"""
+    token = _current_span.set(target)
+    try:
+        yield target
+    finally:
+        _current_span.reset(token)
+
+
+def record_cache_hit(cache: str):
+    """현재 스팬에 캐시 적중 기록"""
+    current = _current_span.get()
+    if current is not None:
+        current.add("cache_hits")
+        current.set(**{f"{cache}_cache_hit": True})
+
+
+def record_error(error):
+    """현재 스팬에 처리된(삼킨) 오류 기록"""
+    current = _current_span.get()
+    if current is not None and current.error is None:
+        current.error = f"{type(error).__name__}: {error}" if isinstance(error, BaseException) else str(error)
+
+
+def record_llm_usage(target: Optional[Span], prompt_tokens: int, completion_tokens: int):
+    """스팬(및 부모 스팬)에 LLM 호출 토큰 수 기록"""
+    if target is None:
+        return
+    target.add("llm_calls")
+    target.add("prompt_tokens", prompt_tokens)
+    target.add("completion_tokens", completion_tokens)
+
+
+def export_prometheus() -> str:
+    """집계 결과를 Prometheus 텍스트 형식으로 반환"""
+    return registry.to_prometheus()
+
+
+def export_json() -> Dict[str, Any]:
+    """집계 결과를 JSON 직렬화 가능한 딕셔너리로 반환"""
+    return registry.to_json()